@@ -27,21 +27,12 @@ import math
 import numpy as np
 import urllib
 
-from PyQt5.QtCore import Qt, QSize, QMargins, QDir, QPoint, QPointF, QRectF, QTimer, pyqtSlot, pyqtSignal, QSettings, QFileInfo, QModelIndex
+from PyQt5.QtCore import Qt, QSize, QMargins, QDir, QPoint, QPointF, QRectF, QTimer, pyqtSlot, pyqtSignal, QSettings, QFileInfo, QModelIndex, QThreadPool
 from PyQt5.QtGui import QFontDatabase, QFont, QPixmap, QIcon, QKeySequence, QPen
 from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow, QFileDialog, QComboBox, QMenuBar, QMenu, QSizePolicy, QScrollArea, \
     QLabel, QToolButton, QPushButton, QSlider, \
     QMessageBox, QGroupBox, QHBoxLayout, QVBoxLayout, QTextEdit, QLineEdit, QGraphicsView, QAction, QGraphicsItem
 
-# PYTORCH
-try:
-    import torch
-    from torch.nn.functional import upsample
-except Exception as e:
-    print("Incompatible version between pytorch, cuda and python.\n" +
-          "Knowing working version combinations are\n: Cuda 10.0, pytorch 1.0.0, python 3.6.8" + str(e))
-   # exit()
-
 # CUSTOM
 import source.Mask as Mask
 import source.RasterOps as rasterops
@@ -60,17 +51,13 @@ from source.QtTrainingResultsWidget import QtTrainingResultsWidget
 from source.QtTYNWidget import QtTYNWidget
 from source.QtComparePanel import QtComparePanel
 from source.QtProjectWidget import QtProjectWidget
-from source.Project import Project, loadProject
+from source.Project import Project, loadProject, snapshot, saveSnapshot
 from source.Image import Image
-from source.MapClassifier import MapClassifier
 from source.NewDataset import NewDataset
+from source.Worker import Worker
 
 from source import utils
 
-# training modules
-from models.coral_dataset import CoralsDataset
-import models.training as training
-
 
 # LOGGING
 import logging
@@ -82,6 +69,42 @@ LOG_FILENAME = "TagLab.log"
 logging.basicConfig(level=logging.DEBUG, filemode='w', filename=LOG_FILENAME, format = '%(asctime)s %(levelname)-8s %(message)s')
 logfile = logging.getLogger("tool-logger")
 
+# ICONS (each icon file is loaded only once)
+icons_cache = {}
+
+def loadIcon(filename):
+    icon = icons_cache.get(filename)
+    if icon is None:
+        icon = QIcon(os.path.join("icons", filename))
+        icons_cache[filename] = icon
+    return icon
+
+# PIXMAPS (loaded, and scaled, only once)
+pixmaps_cache = {}
+
+def loadPixmap(filename, width):
+    pxmap = pixmaps_cache.get((filename, width))
+    if pxmap is None:
+        pxmap = QPixmap(os.path.join("icons", filename)).scaledToWidth(width)
+        pixmaps_cache[(filename, width)] = pxmap
+    return pxmap
+
+# STYLE OF THE MENUS
+STYLE_MENUBAR = "QMenuBar::item:selected{\
+    background-color: rgb(110, 110, 120);\
+    color: rgb(255, 255, 255);\
+    }"
+
+STYLE_MENU = "QMenu::item:selected{\
+    background-color: rgb(110, 110, 120);\
+    color: rgb(255, 255, 255);\
+    }"
+
+STYLE_CONTEXT_MENU = "QMenu::item:selected{\
+    background-color: rgb(110, 110, 120);\
+    color: rgb(255, 255, 255);\
+    } QMenu::item:disabled { color:rgb(150, 150, 150); }"
+
 class TagLab(QWidget):
 
     def __init__(self, parent=None):
@@ -122,6 +145,8 @@ class TagLab(QWidget):
         self.recentFileActs = []  #refactor to self.maxRecentProjects
         self.maxRecentFiles = 4   #refactor to maxRecentProjects
         self.separatorRecentFilesAct = None    #refactor to separatorRecentFiles
+        self.settings = QSettings('VCLAB', 'TagLab')
+        self.recent_files_shown = None    # list of files currently shown in the recent files menu
 
 
         ##### INTERFACE #####
@@ -169,11 +194,9 @@ class TagLab(QWidget):
         self.labelSeparator = QLabel()
         self.labelSeparator.setPixmap(self.pxmapSeparator.scaled(QSize(35, 30)))
         self.btnSplitScreen = self.newButton("split.png", "Split screen", flatbuttonstyle1, self.toggleComparison)
-        self.btnAutoMatch = self.newButton("automatch.png", "Compute automatic matches", flatbuttonstyle1, self.autoCorrespondences)
-        self.btnMatch = self.newButton("manualmatch.png", "Add manual matches ", flatbuttonstyle1, self.matchTool)
-
         # NOTE: Automatic matches button is not checkable
-        self.btnAutoMatch.setCheckable(False)
+        self.btnAutoMatch = self.newButton("automatch.png", "Compute automatic matches", flatbuttonstyle1, self.autoCorrespondences, checkable=False)
+        self.btnMatch = self.newButton("manualmatch.png", "Add manual matches ", flatbuttonstyle1, self.matchTool)
 
         layout_tools = QVBoxLayout()
         layout_tools.setSpacing(0)
@@ -211,10 +234,48 @@ class TagLab(QWidget):
         #self.refineActionErode  = self.newAction("Refine Border Erode",     "-",   self.refineBorderErode)
         self.fillAction         = self.newAction("Fill Label",              "F",   self.fillLabel)
 
+        # the context menu is built once, it is only shown when requested
+        self.contextMenu = self.createContextMenu()
+
+        # KEYS WITHOUT MODIFIERS -> OPERATION
+        self.keyActions = {
+            Qt.Key_A: self.assignOperation,
+            Qt.Key_Delete: self.deleteSelectedBlobs,
+            Qt.Key_B: self.attachBoundaries,
+            Qt.Key_M: self.union,                   # MERGE OVERLAPPED BLOBS
+            Qt.Key_C: self.switch,                  # TOGGLE RGB/DEPTH CHANNELS
+            Qt.Key_S: self.subtract,                # SUBTRACTION BETWEEN TWO BLOBS (A = A / B), THEN BLOB B IS DELETED
+            Qt.Key_D: self.divide,                  # SUBTRACTION BETWEEN TWO BLOBS (A = A / B), BLOB B IS NOT DELETED
+            Qt.Key_R: self.refineBorder,
+            Qt.Key_Plus: self.dilate,
+            Qt.Key_Minus: self.erode,
+            Qt.Key_F: self.fillLabel,
+            Qt.Key_1: self.move,                    # ACTIVATE "MOVE" TOOL
+            Qt.Key_2: self.assign,                  # ACTIVATE "ASSIGN" TOOL
+            Qt.Key_3: self.freehandSegmentation,    # ACTIVATE "FREEHAND" TOOL
+            Qt.Key_4: self.editBorder,              # ACTIVATE "EDIT BORDER" TOOL
+            Qt.Key_5: self.cut,                     # ACTIVATE "CUT SEGMENTATION" TOOL
+            Qt.Key_6: self.createCrack,             # ACTIVATE "CREATE CRACK" TOOL
+            # Qt.Key_7: self.splitBlob,             # ACTIVATE "SPLIT BLOB" TOOL
+            Qt.Key_8: self.ruler,                   # ACTIVATE "RULER" TOOL
+            Qt.Key_9: self.deepExtreme              # ACTIVATE "4-CLICK" TOOL
+        }
+
 
         # VIEWERPLUS
 
 
+        # last visible area shown in the view info (see updateViewInfo)
+        self.last_view_label = None
+
+        # border refinement running in background (see refineBorder)
+        self.refine_worker = None
+        self.refine_context = None
+
+        # automatic classification running in background (see applyClassifier)
+        self.classifier_worker = None
+        self.classifier_context = None
+
         # main viewer
         self.viewerplus = QtImageViewerPlus(self.taglab_dir)
         self.viewerplus.logfile = logfile
@@ -264,6 +325,12 @@ class TagLab(QWidget):
         self.sliderTrasparency.setTickInterval(10)
         self.sliderTrasparency.valueChanged[int].connect(self.sliderTrasparencyChanged)
 
+        # the transparency is applied at most once per frame while the slider is dragged
+        self.transparencyTimer = QTimer(self)
+        self.transparencyTimer.setSingleShot(True)
+        self.transparencyTimer.setInterval(16)
+        self.transparencyTimer.timeout.connect(self.applyTransparency)
+
         self.labelZoomInfo = QLabel("100%")
         self.labelMouseLeftInfo = QLabel("0")
         self.labelMouseTopInfo = QLabel("0")
@@ -471,8 +538,8 @@ class TagLab(QWidget):
         self.labels_widget.activeLabelChanged.connect(self.viewerplus.setActiveLabel)
         self.labels_widget.activeLabelChanged.connect(self.viewerplus2.setActiveLabel)
 
-        self.labels_widget.visibilityChanged.connect(self.viewerplus.updateVisibility)
-        self.labels_widget.visibilityChanged.connect(self.viewerplus2.updateVisibility)
+        self.labels_widget.visibilityChanged.connect(self.viewerplus.updateLabelsVisibility)
+        self.labels_widget.visibilityChanged.connect(self.viewerplus2.updateLabelsVisibility)
 
         self.labels_widget.doubleClickLabel[str].connect(self.viewerplus.assignClass)
         self.labels_widget.doubleClickLabel[str].connect(self.viewerplus2.assignClass)
@@ -513,6 +580,7 @@ class TagLab(QWidget):
 
         # autosave timer
         self.timer = None
+        self.autosave_worker = None
 
         self.disableSplitScreen()
 
@@ -566,20 +634,20 @@ class TagLab(QWidget):
         return action
 
 
-    def newButton(self, icon, tooltip, style, callback):
+    def newButton(self, icon, tooltip, style, callback, checkable=True):
         #ICON_SIZE = 48
         ICON_SIZE = 35
         BUTTON_SIZE = 35
 
+        size = QSize(ICON_SIZE, ICON_SIZE)
+
         button = QPushButton()
-        button.setEnabled(True)
-        button.setCheckable(True)
+        button.setCheckable(checkable)
         button.setFlat(True)
         button.setStyleSheet(style)
-        button.setMinimumWidth(ICON_SIZE)
-        button.setMinimumHeight(ICON_SIZE)
-        button.setIcon(QIcon(os.path.join("icons", icon)))
-        button.setIconSize(QSize(ICON_SIZE, ICON_SIZE))
+        button.setMinimumSize(size)
+        button.setIcon(loadIcon(icon))
+        button.setIconSize(size)
         button.setMaximumWidth(BUTTON_SIZE)
         button.setToolTip(tooltip)
         button.clicked.connect(callback)
@@ -588,6 +656,9 @@ class TagLab(QWidget):
     @pyqtSlot()
     def updateEditActions(self):
         nSelected = len(self.viewerplus.selected_blobs) + len(self.viewerplus2.selected_blobs)
+        # no editing while the automatic classification is running
+        if self.classifier_worker is not None:
+            nSelected = 0
         self.assignAction.setEnabled(nSelected > 0)
         self.deleteAction.setEnabled(nSelected > 0)
         self.mergeAction.setEnabled(nSelected > 1)
@@ -601,6 +672,21 @@ class TagLab(QWidget):
         #self.refineActionErode.setEnabled(nSelected == 1)
         self.fillAction.setEnabled(nSelected > 0)
 
+    def enableEditing(self, enabled):
+        """
+        Enable/disable the editing tools and operations (e.g. while the automatic classification is running).
+        Only the pan tool is left available when editing is disabled.
+        """
+        if not enabled:
+            self.setTool("MOVE")
+
+        for button in [self.btnAssign, self.btnEditBorder, self.btnCut, self.btnFreehand, self.btnCreateCrack,
+                       self.btnWatershed, self.btnRuler, self.btnDeepExtreme, self.btnAutoClassification,
+                       self.btnSplitScreen, self.btnAutoMatch, self.btnMatch]:
+            button.setEnabled(enabled)
+
+        self.updateEditActions()
+
     def activateAutosave(self):
 
         pass
@@ -612,22 +698,33 @@ class TagLab(QWidget):
 
     @pyqtSlot()
     def autosave(self):
+
+        # the previous autosave is still running
+        if self.autosave_worker is not None:
+            return
+
         filename, file_extension = os.path.splitext(self.project.filename)
-        self.project.save(filename + "_autosave.json")
 
-    # call by pressing right button
-    def openContextMenu(self, position):
+        # only the snapshot is taken here, the encoding and the writing are done in background
+        data = snapshot(self.project.__dict__)
+        self.autosave_worker = Worker(saveSnapshot, data, filename + "_autosave.json")
+        self.autosave_worker.signals.finished.connect(self.autosaveDone)
+        QThreadPool.globalInstance().start(self.autosave_worker)
 
+    @pyqtSlot(object, str)
+    def autosaveDone(self, result, error):
+        self.autosave_worker = None
 
-        menu = QMenu(self)
-        menu.setAutoFillBackground(True)
+        if error:
+            logfile.error("[AUTOSAVE] Autosave FAILED: %s", error)
+            self.infoWidget.setInfoMessage("Autosave failed: " + error)
 
-        str = "QMenu::item:selected{\
-            background-color: rgb(110, 110, 120);\
-            color: rgb(255, 255, 255);\
-            } QMenu::item:disabled { color:rgb(150, 150, 150); }"
+    # call by pressing right button
+    def createContextMenu(self):
 
-        menu.setStyleSheet(str)
+        menu = QMenu(self)
+        menu.setAutoFillBackground(True)
+        menu.setStyleSheet(STYLE_CONTEXT_MENU)
 
         menu.addAction(self.assignAction)
         menu.addAction(self.deleteAction)
@@ -647,8 +744,12 @@ class TagLab(QWidget):
         #menu.addAction(self.refineActionErode)
         menu.addAction(self.fillAction)
 
+        return menu
+
+    def openContextMenu(self, position):
+
         viewer = self.sender()
-        action = menu.exec_(viewer.mapToGlobal(position))
+        self.contextMenu.exec_(viewer.mapToGlobal(position))
 
 
     def setProjectTitle(self, project_name):
@@ -661,7 +762,7 @@ class TagLab(QWidget):
 
         if project_name != "NONE":
 
-            settings = QSettings('VCLAB', 'TagLab')
+            settings = self.settings
             files = settings.value('recentFileList')
 
             if files:
@@ -791,20 +892,10 @@ class TagLab(QWidget):
         menubar = QMenuBar(self)
         menubar.setAutoFillBackground(True)
 
-        styleMenuBar = "QMenuBar::item:selected{\
-            background-color: rgb(110, 110, 120);\
-            color: rgb(255, 255, 255);\
-            }"
-
-        styleMenu = "QMenu::item:selected{\
-            background-color: rgb(110, 110, 120);\
-            color: rgb(255, 255, 255);\
-            }"
-
-        menubar.setStyleSheet(styleMenuBar)
+        menubar.setStyleSheet(STYLE_MENUBAR)
 
         self.filemenu = menubar.addMenu("&File")
-        self.filemenu.setStyleSheet(styleMenu)
+        self.filemenu.setStyleSheet(STYLE_MENU)
         self.filemenu.addAction(newAct)
         self.filemenu.addAction(openAct)
         #self.filemenu.addAction(editAct)
@@ -853,14 +944,14 @@ class TagLab(QWidget):
         switchAct.triggered.connect(self.switch)
 
         self.demmenu = menubar.addMenu("&DEM")
-        self.demmenu.setStyleSheet(styleMenu)
+        self.demmenu.setStyleSheet(STYLE_MENU)
         self.demmenu.addAction(switchAct)
         self.demmenu.addAction(calculateSurfaceAreaAct)
         self.demmenu.addAction(exportClippedRasterAct)
 
 
         self.editmenu = menubar.addMenu("&Edit")
-        self.editmenu.setStyleSheet(styleMenu)
+        self.editmenu.setStyleSheet(STYLE_MENU)
         self.editmenu.addAction(undoAct)
         self.editmenu.addAction(redoAct)
         self.editmenu.addSeparator()
@@ -897,14 +988,14 @@ class TagLab(QWidget):
         exportMatchLabels.triggered.connect(self.exportMatches)
 
         self.comparemenu = menubar.addMenu("&Comparison")
-        self.comparemenu.setStyleSheet(styleMenu)
+        self.comparemenu.setStyleSheet(STYLE_MENU)
         self.comparemenu.addAction(splitScreenAction)
         self.comparemenu.addAction(autoMatchLabels)
         self.comparemenu.addAction(manualMatchLabels)
         self.comparemenu.addAction(exportMatchLabels)
 
         self.helpmenu = menubar.addMenu("&Help")
-        self.helpmenu.setStyleSheet(styleMenu)
+        self.helpmenu.setStyleSheet(STYLE_MENU)
         self.helpmenu.addAction(helpAct)
         self.helpmenu.addAction(aboutAct)
 
@@ -1051,17 +1142,22 @@ class TagLab(QWidget):
 
     def updateRecentFileActions(self):
 
-        settings = QSettings('VCLAB', 'TagLab')
-        files = settings.value('recentFileList')
+        files = self.settings.value('recentFileList')
 
         if files:
-            numRecentFiles = min(len(files), self.maxRecentFiles)
+            files = files[:self.maxRecentFiles]
 
-            for i in range(numRecentFiles):
-                text = "&%d. %s" % (i + 1, QFileInfo(files[i]).fileName())
-                self.recentFileActs[i].setText(text)
-                self.recentFileActs[i].setData(files[i])
-                self.recentFileActs[i].setVisible(True)
+            # the menu already shows these files
+            if files == self.recent_files_shown:
+                return
+            self.recent_files_shown = list(files)
+
+            numRecentFiles = len(files)
+
+            for i, (action, filename) in enumerate(zip(self.recentFileActs, files)):
+                action.setText("&%d. %s" % (i + 1, QFileInfo(filename).fileName()))
+                action.setData(filename)
+                action.setVisible(True)
 
             for j in range(numRecentFiles, self.maxRecentFiles):
                 self.recentFileActs[j].setVisible(False)
@@ -1071,7 +1167,7 @@ class TagLab(QWidget):
 
     def keyPressEvent(self, event):
 
-        modifiers = QApplication.queryKeyboardModifiers()
+        modifiers = event.modifiers()
         if self.activeviewer:
             active_annotations = self.activeviewer.annotations
         else:
@@ -1087,119 +1183,39 @@ class TagLab(QWidget):
             else:
                 key_pressed = event.text()
 
+        # the message is formatted by the logger only if it is really written
         if modifiers == Qt.ControlModifier:
-            msg = "[KEYPRESS] Key CTRL + '" + key_pressed + "' has been pressed."
+            logfile.info("[KEYPRESS] Key CTRL + '%s' has been pressed.", key_pressed)
         elif modifiers == Qt.ShiftModifier:
-            msg = "[KEYPRESS] Key ALT + '" + key_pressed + "' has been pressed."
+            logfile.info("[KEYPRESS] Key ALT + '%s' has been pressed.", key_pressed)
         elif modifiers == Qt.AltModifier:
-            msg = "[KEYPRESS] Key SHIFT + '" + key_pressed + "' has been pressed."
+            logfile.info("[KEYPRESS] Key SHIFT + '%s' has been pressed.", key_pressed)
         else:
-            msg = "[KEYPRESS] Key '" + key_pressed + "' has been pressed."
+            logfile.info("[KEYPRESS] Key '%s' has been pressed.", key_pressed)
 
-        logfile.info(msg)
+        key = event.key()
 
-        if event.key() == Qt.Key_Escape:
+        if key == Qt.Key_Escape:
             if self.activeviewer is not None:
             # RESET CURRENT OPERATION
                 self.activeviewer.resetSelection()
                 self.activeviewer.resetTools()
 
-                message = "[TOOL][" + self.activeviewer.tools.tool + "] Current operation has been canceled."
-                logfile.info(message)
+                logfile.info("[TOOL][%s] Current operation has been canceled.", self.activeviewer.tools.tool)
 
-        elif event.key() == Qt.Key_S and modifiers & Qt.ControlModifier:
+        elif key == Qt.Key_S and modifiers & Qt.ControlModifier:
             self.save()
 
-        elif event.key() == Qt.Key_S and modifiers & Qt.AltModifier:
+        elif key == Qt.Key_S and modifiers & Qt.AltModifier:
 
             if self.split_screen_flag is True:
                 self.disableSplitScreen()
             else:
                 self.enableSplitScreen()
 
-        elif event.key() == Qt.Key_A:
-            self.assignOperation()
-
-        elif event.key() == Qt.Key_Delete:
-            self.deleteSelectedBlobs()
-
-        elif event.key() == Qt.Key_X:
-
-            pass
-
-        elif event.key() == Qt.Key_B:
-            self.attachBoundaries()
-
-        elif event.key() == Qt.Key_M:
-            # MERGE OVERLAPPED BLOBS
-            self.union()
-
-        elif event.key() == Qt.Key_C:
-            # TOGGLE RGB/DEPTH CHANNELS
-            self.switch()
-
-        elif event.key() == Qt.Key_S:
-            # SUBTRACTION BETWEEN TWO BLOBS (A = A / B), THEN BLOB B IS DELETED
-            self.subtract()
-
-        elif event.key() == Qt.Key_D:
-            # SUBTRACTION BETWEEN TWO BLOBS (A = A / B), BLOB B IS NOT DELETED
-            self.divide()
-
-        elif event.key() == Qt.Key_R:
-            self.refineBorder()
-
-        elif event.key() == Qt.Key_Plus:
-            self.dilate()
-            # self.refineBorderDilate()
-
-        elif event.key() == Qt.Key_Minus:
-            self.erode()
-            # self.refineBorderDilate()
-
-        elif event.key() == Qt.Key_F:
-            self.fillLabel()
-
-        elif event.key() == Qt.Key_1:
-            # ACTIVATE "MOVE" TOOL
-            self.move()
-
-        elif event.key() == Qt.Key_2:
-            # ACTIVATE "ASSIGN" TOOL
-            self.assign()
-
-        elif event.key() == Qt.Key_3:
-            # ACTIVATE "FREEHAND" TOOL
-            self.freehandSegmentation()
-
-        elif event.key() == Qt.Key_4:
-            # ACTIVATE "EDIT BORDER" TOOL
-            self.editBorder()
-        elif event.key() == Qt.Key_5:
-
-            # ACTIVATE "CUT SEGMENTATION" TOOL
-            self.cut()
-
-        elif event.key() == Qt.Key_6:
-            # ACTIVATE "CREATE CRACK" TOOL
-            self.createCrack()
-
-        # elif event.key() == Qt.Key_7:
-        #     # ACTIVATE "SPLIT BLOB" TOOL
-        #     self.splitBlob()
-
-        elif event.key() == Qt.Key_8:
-            # ACTIVATE "RULER" TOOL
-            self.ruler()
-
-        elif event.key() == Qt.Key_9:
-            # ACTIVATE "4-CLICK" TOOL
-            self.deepExtreme()
-
-
-        elif event.key() == Qt.Key_4:
-            # ACTIVATE "DEEP EXTREME" TOOL
-            self.deepExtreme()
+        elif key in self.keyActions:
+            if self.classifier_worker is None:
+                self.keyActions[key]()
 
         #elif event.key() == Qt.Key_P:
         #    self.drawDeepExtremePoints()
@@ -1207,14 +1223,14 @@ class TagLab(QWidget):
         # elif event.key() == Qt.Key_Y:
         #     self.refineAllBorders()
 
-        elif event.key() == Qt.Key_Home:
+        elif key == Qt.Key_Home:
             # ASSIGN LABEL
             active_annotations.refine_depth_weight += 0.1;
             if active_annotations.refine_depth_weight > 1.0:
                 active_annotations.refine_depth_weight = 1.0;
             print("Depth weight: " + str(active_annotations.refine_depth_weight))
 
-        elif event.key() == Qt.Key_End:
+        elif key == Qt.Key_End:
             # ASSIGN LABEL
             active_annotations.refine_depth_weight -= 0.1;
             if active_annotations.refine_depth_weight < 0.0:
@@ -1222,15 +1238,15 @@ class TagLab(QWidget):
             print("Depth weight: " + str(active_annotations.refine_depth_weight))
 
 
-        elif event.key() == Qt.Key_BracketLeft:
+        elif key == Qt.Key_BracketLeft:
             active_annotations.refine_conservative *= 0.9
             print("Conservative: " + str(active_annotations.refine_conservative))
 
-        elif event.key() == Qt.Key_BracketRight:
+        elif key == Qt.Key_BracketRight:
             active_annotations.refine_conservative *= 1.1
             print("Conservative: " + str(active_annotations.refine_conservative))
 
-        elif event.key() == Qt.Key_Space:
+        elif key == Qt.Key_Space and self.classifier_worker is None:
             if self.activeviewer.tools.tool == "MATCH":
                 self.createMatch()
             else:
@@ -1464,8 +1480,8 @@ class TagLab(QWidget):
             correspondences = self.project.getImagePairCorrespondences(img_source_index, img_target_index)
             data = correspondences.data
             selection = data.loc[data["Action"] == type]
-            sourceblobs = selection['Blob1'].tolist()
-            targetblobs = selection['Blob2'].tolist()
+            sourceblobs = set(selection['Blob1'].tolist())
+            targetblobs = set(selection['Blob2'].tolist())
             for b in self.viewerplus.annotations.seg_blobs:
                 self.viewerplus.setBlobVisible(b, b.id in sourceblobs)
             for b in self.viewerplus2.annotations.seg_blobs:
@@ -1611,6 +1627,11 @@ class TagLab(QWidget):
         # update transparency value
         str1 = "Transparency {}%".format(value)
         self.lblSlider.setText(str1)
+        self.transparencyTimer.start()
+
+    @pyqtSlot()
+    def applyTransparency(self):
+        value = self.sliderTrasparency.value()
         self.viewerplus.applyTransparency(value)
 
         if self.viewerplus2.isVisible():
@@ -1621,13 +1642,19 @@ class TagLab(QWidget):
     def updateViewInfo(self):
 
 
-        topleft = self.viewerplus.mapToScene(QPoint(0, 0))
-        bottomright = self.viewerplus.mapToScene(self.viewerplus.viewport().rect().bottomRight())
+        # the visible area has just been computed by the viewer (see QtImageViewer.viewChanged)
+        view = self.viewerplus.scene_view
+        (left, top) = self.viewerplus.clampCoords(view.left(), view.top())
+        (right, bottom) = self.viewerplus.clampCoords(view.right(), view.bottom())
+        zf = self.viewerplus.zoom_factor * 100.0
+
+        # nothing to update if the visible area (in pixels) and the zoom are unchanged
+        view_label = (int(top), int(left), int(bottom), int(right), round(zf, 2))
+        if view_label == self.last_view_label:
+            return
+        self.last_view_label = view_label
 
-        (left, top) = self.viewerplus.clampCoords(topleft.x(), topleft.y())
-        (right, bottom) = self.viewerplus.clampCoords(bottomright.x(), bottomright.y())
         self.updateMousePos(0, 0) #todo we should separate zoom from coords
-        zf = self.viewerplus.zoom_factor * 100.0
         zoom = "{:6.0f}%".format(zf)
         self.labelZoomInfo.setText(zoom)
 
@@ -1714,7 +1741,7 @@ class TagLab(QWidget):
         self.viewerplus.setTool(tool)
         self.viewerplus2.setTool(tool)
         newtool[1].setChecked(True)
-        logfile.info("[TOOL][" + tool + "] Tool activated")
+        logfile.info("[TOOL][%s] Tool activated", tool)
         self.infoWidget.setInfoMessage(newtool[0] + " Tool is active")
         self.comboboxSourceImage.setEnabled(True)
         self.comboboxTargetImage.setEnabled(True)
@@ -1934,8 +1961,7 @@ class TagLab(QWidget):
 
         if len(view.selected_blobs) > 1:
 
-            message = "[OP-MERGE] MERGE OVERLAPPED LABELS operation begins.. (number of selected blobs: " + str(len(view.selected_blobs)) + ")"
-            logfile.info(message)
+            logfile.info("[OP-MERGE] MERGE OVERLAPPED LABELS operation begins.. (number of selected blobs: %d)", len(view.selected_blobs))
 
             #union returns a NEW blob
             union_blob = view.annotations.union(view.selected_blobs)
@@ -1943,11 +1969,12 @@ class TagLab(QWidget):
             if union_blob is None:
                 logfile.info("[OP-MERGE] INVALID MERGE OVERLAPPED LABELS -> blobs are separated.")
             else:
-                for blob in view.selected_blobs:
-                    view.removeBlob(blob)
-                    self.logBlobInfo(blob, "[OP-MERGE][BLOB-REMOVED]")
+                with view.batchUpdates():
+                    for blob in list(view.selected_blobs):
+                        view.removeBlob(blob)
+                        self.logBlobInfo(blob, "[OP-MERGE][BLOB-REMOVED]")
 
-                view.addBlob(union_blob, selected=True)
+                    view.addBlob(union_blob, selected=True)
                 view.saveUndo()
 
                 self.logBlobInfo(union_blob, "[OP-MERGE][BLOB-CREATED]")
@@ -1969,8 +1996,7 @@ class TagLab(QWidget):
 
         if len(view.selected_blobs) == 2:
 
-            message = "[OP-SUBTRACT] SUBTRACT LABELS operation begins.. (number of selected blobs: " + str(len(view.selected_blobs)) + ")"
-            logfile.info(message)
+            logfile.info("[OP-SUBTRACT] SUBTRACT LABELS operation begins.. (number of selected blobs: %d)", len(view.selected_blobs))
 
             selectedA = view.selected_blobs[0]
             selectedB = view.selected_blobs[1]
@@ -1986,9 +2012,10 @@ class TagLab(QWidget):
                 self.logBlobInfo(blobA, "[OP-SUBTRACT][BLOB-EDITED]")
                 self.logBlobInfo(selectedB, "[OP-SUBTRACT][BLOB-REMOVED]")
 
-                view.removeBlob(selectedA)
-                view.removeBlob(selectedB)
-                view.addBlob(blobA, selected=True)
+                with view.batchUpdates():
+                    view.removeBlob(selectedA)
+                    view.removeBlob(selectedB)
+                    view.addBlob(blobA, selected=True)
                 view.saveUndo()
 
             logfile.info("[OP-SUBTRACT] SUBTRACT LABELS operation ends.")
@@ -2007,8 +2034,7 @@ class TagLab(QWidget):
 
         if len(view.selected_blobs) == 2:
 
-            message = "[OP-DIVIDE] DIVIDE LABELS operation begins.. (number of selected blobs: " + str(len(view.selected_blobs)) + ")"
-            logfile.info(message)
+            logfile.info("[OP-DIVIDE] DIVIDE LABELS operation begins.. (number of selected blobs: %d)", len(view.selected_blobs))
 
             selectedA = view.selected_blobs[0]
             selectedB = view.selected_blobs[1]
@@ -2028,8 +2054,9 @@ class TagLab(QWidget):
                 self.logBlobInfo(selectedB, "[OP-DIVIDE][BLOB-SELECTED]")
                 self.logBlobInfo(blobB, "[OP-DIVIDE][BLOB-EDITED]")
 
-                view.updateBlob(selectedA, blobA, selected=False)
-                view.updateBlob(selectedB, blobB, selected=False)
+                with view.batchUpdates():
+                    view.updateBlob(selectedA, blobA, selected=False)
+                    view.updateBlob(selectedB, blobB, selected=False)
                 view.saveUndo()
 
             logfile.info("[OP-DIVIDE] DIVIDE LABELS operation ends.")
@@ -2048,7 +2075,7 @@ class TagLab(QWidget):
 
         if len(view.selected_blobs) > 0:
 
-            blobs = view.selected_blobs
+            blobs = list(view.selected_blobs)
             for blob in blobs:
                 blob_dilated = blob.copy()
                 blob_dilated.dilate(size=3)
@@ -2066,7 +2093,7 @@ class TagLab(QWidget):
 
         if len(view.selected_blobs) > 0:
 
-            blobs = view.selected_blobs
+            blobs = list(view.selected_blobs)
             for blob in blobs:
                 blob_eroded = blob.copy()
                 blob_eroded.erode(size=3)
@@ -2162,6 +2189,9 @@ class TagLab(QWidget):
         if view is None:
             return
 
+        if self.refine_worker is not None:
+            return
+
         if len(view.selected_blobs) == 1:
             selected = view.selected_blobs[0]
             if view.refine_original_blob is None or view.refine_original_blob.id != selected.id:
@@ -2182,6 +2212,9 @@ class TagLab(QWidget):
         if view is None:
             return
 
+        if self.refine_worker is not None:
+            return
+
         if len(view.selected_blobs) == 1:
             selected = view.selected_blobs[0]
             if view.refine_original_blob is None or view.refine_original_blob.id != selected.id:
@@ -2201,6 +2234,9 @@ class TagLab(QWidget):
         if view is None:
             return
 
+        if self.refine_worker is not None:
+            return
+
         if len(view.selected_blobs) == 1:
             selected = view.selected_blobs[0]
             if view.refine_original_blob is None or view.refine_original_blob.id != selected.id:
@@ -2223,6 +2259,10 @@ class TagLab(QWidget):
         if view is None:
             return
 
+        # a refinement is still running
+        if self.refine_worker is not None:
+            return
+
         # padding mask to allow moving boundary
         padding = 35
         if len(view.selected_blobs) == 1:
@@ -2250,8 +2290,7 @@ class TagLab(QWidget):
             bbox[2] += 2*padding  # width
             bbox[3] += 2*padding  # height
 
-            img = utils.cropQImage(view.img_map, bbox)
-            img = utils.qimageToNumpyArray(img)
+            img = utils.cropImage(view.imgMapArray(), bbox)
 
             # USE DEPTH INFORMATION IF AVAILABLE
             # if view.depth_map is not None:
@@ -2279,18 +2318,54 @@ class TagLab(QWidget):
             if view.tools.tool != 'EDITBORDER':
                 view.tools.edit_points.last_editborder_points = None
 
+            if view.tools.edit_points.last_blob != selected:
+                view.tools.edit_points.last_editborder_points = None
+
             try:
-                if view.tools.edit_points.last_blob != selected:
-                    view.tools.edit_points.last_editborder_points = None
-                created_blobs = view.annotations.refineBorder(bbox, selected, img, depth, mask, view.refine_grow, view.tools.edit_points.last_editborder_points)
+                clippoints = view.annotations.refineClipPoints(bbox, selected, view.tools.edit_points.last_editborder_points)
+            except Exception as e:
+                print("FAILED!", e)
+                return
 
-                if len(created_blobs) == 0:
-                    pass
-                if len(created_blobs) == 1:
-                    view.updateBlob(selected, created_blobs[0])
-                    self.logBlobInfo(created_blobs[0], "[OP-REFINE-BORDER][BLOB-CREATED]")
-                    self.logBlobInfo(created_blobs[0], "[OP-REFINE-BORDER][BLOB-REFINED]")
-                else:
+            # the segmentation runs in a worker thread (the mask is refined in place), the blobs are updated in
+            # refineBorderDone
+            self.refine_context = (view, selected, bbox, mask)
+            self.refine_worker = Worker(view.annotations.refineMask, img, depth, mask, clippoints, view.refine_grow)
+            self.refine_worker.signals.finished.connect(self.refineBorderDone)
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            QThreadPool.globalInstance().start(self.refine_worker)
+
+        else:
+            self.infoWidget.setInfoMessage("You need to select <em>one</em> blob for REFINE operation.")
+
+    @pyqtSlot(object, str)
+    def refineBorderDone(self, result, error):
+
+        (view, selected, bbox, mask) = self.refine_context
+        self.refine_context = None
+        self.refine_worker = None
+        QApplication.restoreOverrideCursor()
+
+        if error:
+            logfile.error("[OP-REFINE-BORDER] REFINE-BORDER FAILED: %s", error)
+            self.infoWidget.setInfoMessage("Refine border failed: " + error)
+            return
+
+        # the blob has been removed (or replaced) in the meanwhile
+        if selected not in view.annotations.seg_blobs:
+            return
+
+        try:
+            created_blobs = view.annotations.blobsFromRefinedMask(bbox, selected, mask)
+
+            if len(created_blobs) == 0:
+                pass
+            if len(created_blobs) == 1:
+                view.updateBlob(selected, created_blobs[0])
+                self.logBlobInfo(created_blobs[0], "[OP-REFINE-BORDER][BLOB-CREATED]")
+                self.logBlobInfo(created_blobs[0], "[OP-REFINE-BORDER][BLOB-REFINED]")
+            else:
+                with view.batchUpdates():
                     view.removeBlob(selected)
                     for blob in created_blobs:
                         view.addBlob(blob, selected=True)
@@ -2298,14 +2373,10 @@ class TagLab(QWidget):
                         self.logBlobInfo(blob, "[OP-REFINE-BORDER][BLOB-CREATED]")
                         self.logBlobInfo(blob, "[OP-REFINE-BORDER][BLOB-REFINED]")
 
-                view.saveUndo()
-
-            except Exception as e:
-                print("FAILED!", e)
-                pass
+            view.saveUndo()
 
-        else:
-            self.infoWidget.setInfoMessage("You need to select <em>one</em> blob for REFINE operation.")
+        except Exception as e:
+            print("FAILED!", e)
 
 
     def fillLabel(self):
@@ -2319,7 +2390,7 @@ class TagLab(QWidget):
         if len(view.selected_blobs) == 0:
             return
         count = 0
-        for blob in view.selected_blobs:
+        for blob in list(view.selected_blobs):
             if len(blob.inner_contours) == 0:
                 continue
             count += 1
@@ -2343,15 +2414,13 @@ class TagLab(QWidget):
 
     def logBlobInfo(self, blob, tag):
 
-        message1 = tag + " BLOBID=" + str(blob.id) + " VERSION=" + str(blob.version) + " CLASS=" + blob.class_name
-        message2 = tag + " top={:.1f} left={:.1f} width={:.1f} height={:.1f}".format(blob.bbox[0], blob.bbox[1], blob.bbox[2], blob.bbox[3])
-        message3 = tag + " cx={:.1f} cy={:.1f}".format(blob.centroid[0], blob.centroid[1])
-        message4 = tag + " A={:.1f} P={:.1f} ".format(blob.area, blob.perimeter)
+        if not logfile.isEnabledFor(logging.INFO):
+            return
 
-        logfile.info(message1)
-        logfile.info(message2)
-        logfile.info(message3)
-        logfile.info(message4)
+        logfile.info("%s BLOBID=%s VERSION=%s CLASS=%s", tag, blob.id, blob.version, blob.class_name)
+        logfile.info("%s top=%.1f left=%.1f width=%.1f height=%.1f", tag, blob.bbox[0], blob.bbox[1], blob.bbox[2], blob.bbox[3])
+        logfile.info("%s cx=%.1f cy=%.1f", tag, blob.centroid[0], blob.centroid[1])
+        logfile.info("%s A=%.1f P=%.1f ", tag, blob.area, blob.perimeter)
 
 
 
@@ -2539,8 +2608,8 @@ class TagLab(QWidget):
             self.updateComboboxSourceImage(index)
 
             w = self.mapviewer.width()
-            thumb = self.viewerplus.pixmap.scaled(w, w, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.mapviewer.setPixmap(thumb)
+            thumb = self.viewerplus.channel.thumbnail(w)
+            self.mapviewer.setPixmap(QPixmap.fromImage(thumb))
             self.mapviewer.setOpacity(0.5)
 
             self.disableSplitScreen()
@@ -2655,9 +2724,7 @@ class TagLab(QWidget):
         icon = QLabel()
 
         # BIG taglab icon
-        pxmap = QPixmap(os.path.join("icons", "taglab240px.png"))
-        pxmap = pxmap.scaledToWidth(160)
-        icon.setPixmap(pxmap)
+        icon.setPixmap(loadPixmap("taglab240px.png", 160))
         icon.setStyleSheet("QLabel {padding: 5px; }");
 
 
@@ -2710,8 +2777,7 @@ class TagLab(QWidget):
 
         # -1, -1 means that the label map imported must not be rescaled
         created_blobs = self.activeviewer.annotations.import_label_map(filename, self.labels_dictionary, -1, -1)
-        for blob in created_blobs:
-            self.activeviewer.addBlob(blob, selected=False)
+        self.activeviewer.addBlobs(created_blobs, selected=False)
         self.activeviewer.saveUndo()
 
         QApplication.restoreOverrideCursor()
@@ -2910,6 +2976,8 @@ class TagLab(QWidget):
 
             new_dataset = NewDataset(self.activeviewer.img_map, self.activeviewer.annotations.seg_blobs, tile_size=1026, step=513)
 
+            # training modules (pytorch) are imported only when needed
+            import models.training as training
             target_classes = training.createTargetClasses(self.activeviewer.annotations)
             target_classes = list(target_classes.keys())
 
@@ -2963,6 +3031,10 @@ class TagLab(QWidget):
     @pyqtSlot()
     def trainNewNetwork(self):
 
+        # training modules (pytorch) are imported only when needed
+        from models.coral_dataset import CoralsDataset
+        import models.training as training
+
         dataset_folder = self.trainYourNetworkWidget.getDatasetFolder()
 
         # check dataset
@@ -3173,8 +3245,7 @@ class TagLab(QWidget):
 
         self.infoWidget.setInfoMessage("The project: " + self.project.filename + " has been successfully open.")
 
-        message = "[PROJECT] The project " + self.project.filename + " has been loaded."
-        logfile.info(message)
+        logfile.info("[PROJECT] The project %s has been loaded.", self.project.filename)
 
 
     def append(self, filename):
@@ -3215,13 +3286,17 @@ class TagLab(QWidget):
 
         self.infoWidget.setInfoMessage("Current project has been successfully saved.")
 
-        message = "[PROJECT] The project " + self.project.filename + " has been saved."
-        logfile.info(message)
+        logfile.info("[PROJECT] The project %s has been saved.", self.project.filename)
 
 
     #REFACTOR networks should be moved to a new class
     def resetNetworks(self):
 
+        # the Deep Extreme network is kept loaded by the tool between the segmentations
+        self.viewerplus.tools.tools["DEEPEXTREME"].resetNetwork()
+        self.viewerplus2.tools.tools["DEEPEXTREME"].resetNetwork()
+
+        import torch
         torch.cuda.empty_cache()
 
         if self.deepextreme_net is not None:
@@ -3292,6 +3367,7 @@ class TagLab(QWidget):
 
         QApplication.processEvents()
 
+        from source.MapClassifier import MapClassifier
         self.classifier = MapClassifier(classifier_selected, self.labels_dictionary)
         self.classifier.updateProgress.connect(self.progress_bar.setProgress)
 
@@ -3403,6 +3479,10 @@ class TagLab(QWidget):
         Apply the chosen classifier to the active image.
         """
 
+        # a classification is already running
+        if self.classifier_worker is not None:
+            return
+
         if self.classifierWidget:
 
             classifier_selected = self.classifierWidget.selected()
@@ -3423,86 +3503,118 @@ class TagLab(QWidget):
             self.progress_bar.hidePerc()
             self.progress_bar.setMessage("Setup automatic classification..")
 
-            QApplication.processEvents()
-
-            message = "[AUTOCLASS] Automatic classification STARTS.. (classifier: )" + classifier_selected['Classifier Name']
-            logfile.info(message)
+            logfile.info("[AUTOCLASS] Automatic classification STARTS.. (classifier: )%s", classifier_selected['Classifier Name'])
 
+            from source.MapClassifier import MapClassifier
             self.classifier = MapClassifier(classifier_selected, self.labels_dictionary)
             self.classifier.updateProgress.connect(self.progress_bar.setProgress)
 
             if self.activeviewer is None:
                 self.resetAutomaticClassification()
             else:
-                # rescaling the map to fit the target scale of the network
+                # the map rescaling and the classification run in a worker thread, see applyClassifierDone
+                self.progress_bar.showPerc()
+                self.progress_bar.setMessage("Classification: ")
+                self.progress_bar.setProgress(0.0)
 
-                self.progress_bar.setMessage("Map rescaling..")
-                QApplication.processEvents()
+                # the results are imported only if the same image is still shown by the same viewer
+                view = self.activeviewer
+                self.classifier_context = (self.classifier, view, view.image, view.annotations)
 
-                orthoimage = self.activeviewer.img_map
+                classifier = self.classifier
+                img_map = view.img_map
+                pixel_size = view.image.pixelSize()
                 target_scale_factor = classifier_selected['Scale']
-                self.classifier.setup(orthoimage, self.activeviewer.image.pixelSize(),
-                                      target_scale_factor,
-                                      working_area=[], padding=256)
 
-                self.progress_bar.showPerc()
-                self.progress_bar.setMessage("Classification: ")
-                self.progress_bar.setProgress(0.0)
-                QApplication.processEvents()
+                def classify():
+                    classifier.setup(img_map, pixel_size, target_scale_factor, working_area=[], padding=256)
+                    classifier.run(768, 512, 128)
 
-                # runs the classifier
+                self.classifier_worker = Worker(classify)
+                self.classifier_worker.signals.finished.connect(self.applyClassifierDone)
+                self.enableEditing(False)
                 self.infoWidget.setInfoMessage("Automatic classification is running..")
+                QThreadPool.globalInstance().start(self.classifier_worker)
 
-                self.classifier.run(768, 512, 128)
+    @pyqtSlot(object, str)
+    def applyClassifierDone(self, result, error):
+        """
+        Import the results of the automatic classification once the worker has finished.
+        """
 
-                if self.classifier.flagStopProcessing is False:
+        (classifier, view, image, annotations) = self.classifier_context
+        self.classifier_context = None
+        self.classifier_worker = None
+        self.enableEditing(True)
 
-                    # import generated label map
-                    self.progress_bar.hidePerc()
-                    self.progress_bar.setMessage("Finalizing classification results..")
-                    QApplication.processEvents()
+        if view.image is not image or view.annotations is not annotations:
 
-                    filename = os.path.join("temp", "labelmap.png")
+            logfile.info("[AUTOCLASS] Automatic classification DISCARDED (the image has been changed).")
 
-                    created_blobs = self.activeviewer.annotations.import_label_map(filename, self.labels_dictionary,
-                                                                                   orthoimage.width(), orthoimage.height())
-                    for blob in created_blobs:
-                        self.viewerplus.addBlob(blob, selected=False)
+            self.resetAutomaticClassification()
+            self.move()
+
+        elif error:
+
+            logfile.error("[AUTOCLASS] Automatic classification FAILED: %s", error)
+
+            self.resetAutomaticClassification()
 
-                    logfile.info("[AUTOCLASS] Automatic classification ENDS.")
+            msgBox = QMessageBox()
+            msgBox.setWindowTitle(self.TAGLAB_VERSION)
+            msgBox.setText("Automatic classification failed: " + error)
+            msgBox.exec()
 
-                    self.resetAutomaticClassification()
+            self.move()
 
-                    # save and close
-                    msgBox = QMessageBox()
-                    msgBox.setWindowTitle(self.TAGLAB_VERSION)
-                    msgBox.setText(
-                    "Automatic classification is finished. TagLab will be close. Please, click ok and save the project.")
-                    msgBox.exec()
+        elif classifier.flagStopProcessing is False:
 
-                    self.saveAsProject()
+            # import generated label map
+            self.progress_bar.hidePerc()
+            self.progress_bar.setMessage("Finalizing classification results..")
 
-                    QApplication.quit()
+            orthoimage = view.img_map
+            created_blobs = view.annotations.import_label_qimage(classifier.label_map, self.labels_dictionary,
+                                                                 orthoimage.width(), orthoimage.height())
+            view.addBlobs(created_blobs, selected=False)
 
-                else:
+            logfile.info("[AUTOCLASS] Automatic classification ENDS.")
 
-                    logfile.info("[AUTOCLASS] Automatic classification STOP by the users.")
+            self.resetAutomaticClassification()
 
-                    self.resetAutomaticClassification()
+            # save and close
+            msgBox = QMessageBox()
+            msgBox.setWindowTitle(self.TAGLAB_VERSION)
+            msgBox.setText(
+            "Automatic classification is finished. TagLab will be close. Please, click ok and save the project.")
+            msgBox.exec()
 
-                    import gc
-                    gc.collect()
+            self.saveAsProject()
 
-                    self.move()
+            QApplication.quit()
+
+        else:
+
+            logfile.info("[AUTOCLASS] Automatic classification STOP by the users.")
+
+            self.resetAutomaticClassification()
+
+            import gc
+            gc.collect()
+
+            self.move()
 
 
 if __name__ == '__main__':
 
+    # skip the subtraction of the opaque sibling widgets from the region repainted by the viewers
+    os.environ["QT_NO_SUBTRACTOPAQUESIBLINGS"] = "1"
+
     # Create the QApplication.
     app = QApplication(sys.argv)
 
     # set application icon
-    app.setWindowIcon(QIcon(os.path.join("icons", "taglab50px.png")))
+    app.setWindowIcon(loadIcon("taglab50px.png"))
 
     slider_style1 = "\
     QSlider::groove::horizontal\
@@ -3519,12 +3631,11 @@ if __name__ == '__main__':
         width: 18px;\
     }"
 
-    app.setStyleSheet("QLabel {color: white}")
-    app.setStyleSheet("QPushButton {background-color: rgb(49,51,53); color: white}")
-    app.setStyleSheet(slider_style1)
-    app.setStyleSheet(slider_style2)
-
-    app.setStyleSheet("QToolTip {color: white; background-color: rgb(49,51,53); border: none; }")
+    # each call of setStyleSheet replaces (and re-parses) the whole stylesheet, it is set only once
+    app.setStyleSheet("QLabel {color: white}" +
+                      "QPushButton {background-color: rgb(49,51,53); color: white}" +
+                      slider_style1 + slider_style2 +
+                      "QToolTip {color: white; background-color: rgb(49,51,53); border: none; }")
 
     # set the application font
 
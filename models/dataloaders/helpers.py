@@ -54,12 +54,13 @@ def crop2fullmask(crop_mask, bbox, im=None, im_size=None, zero_pad=False, relax=
         crop_mask = sk_resize(crop_mask, (bbox[3] - bbox[1] + 1, bbox[2] - bbox[0] + 1), order=0, mode='constant').astype(crop_mask.dtype)
     else:
         crop_mask = cv2.resize(crop_mask, (bbox[2] - bbox[0] + 1, bbox[3] - bbox[1] + 1), interpolation=interpolation)
-    result_ = np.zeros(im_si)
+    # the full masks keep the precision of the crop (float32 for the network output)
+    result_ = np.zeros(im_si, dtype=crop_mask.dtype)
     result_[bbox_valid[1]:bbox_valid[3] + 1, bbox_valid[0]:bbox_valid[2] + 1] = \
         crop_mask[inds[1]:inds[3] + 1, inds[0]:inds[2] + 1]
 
-    result = np.zeros(im_si)
     if mask_relax:
+        result = np.zeros(im_si, dtype=crop_mask.dtype)
         result[bbox_init[1]:bbox_init[3]+1, bbox_init[0]:bbox_init[2]+1] = \
             result_[bbox_init[1]:bbox_init[3]+1, bbox_init[0]:bbox_init[2]+1]
     else:
@@ -293,9 +294,14 @@ def make_gt(img, labels, sigma=10, one_mask_per_point=False):
             for ii in range(labels.shape[0]):
                 gt[:, :, ii] = make_gaussian((h, w), center=labels[ii, :], sigma=sigma)
         else:
-            gt = np.zeros(shape=(h, w), dtype=np.float64)
-            for ii in range(labels.shape[0]):
-                gt = np.maximum(gt, make_gaussian((h, w), center=labels[ii, :], sigma=sigma))
+            # the gaussian is separable: the exponentials are computed on rows and columns only,
+            # and the maximum over all the points is taken in a single broadcast
+            x = np.arange(0, w, 1, float)
+            y = np.arange(0, h, 1, float)
+            k = -4 * np.log(2) / sigma ** 2
+            gx = np.exp(k * (x[np.newaxis, :] - labels[:, 0:1]) ** 2)
+            gy = np.exp(k * (y[np.newaxis, :] - labels[:, 1:2]) ** 2)
+            gt = (gy[:, :, np.newaxis] * gx[:, np.newaxis, :]).max(axis=0)
 
     gt = gt.astype(dtype=img.dtype)
 
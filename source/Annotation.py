@@ -112,11 +112,28 @@ class Annotation(QObject):
         return group
 
     def addBlob(self, blob):
-        used = [blob.id for blob in self.seg_blobs]
+        used = {b.id for b in self.seg_blobs}
         if blob.id in used:
             blob.id = self.getFreeId()
         self.seg_blobs.append(blob)
 
+    def addBlobs(self, blobs):
+        """
+        Add several blobs at once (e.g. when a project is loaded), the used ids are collected only once.
+        The duplicated ids (e.g. the blobs of an imported label map share the same id) are replaced by the
+        smallest free ids, as getFreeId does.
+        """
+        used = {b.id for b in self.seg_blobs}
+        # the used ids only grow, so the search for a free id goes on from the last one found
+        free_id = 0
+        for blob in blobs:
+            if blob.id in used:
+                while free_id in used:
+                    free_id += 1
+                blob.id = free_id
+            used.add(blob.id)
+            self.seg_blobs.append(blob)
+
     def removeBlob(self, blob):
         index = self.seg_blobs.index(blob)
         del self.seg_blobs[index]
@@ -148,7 +165,18 @@ class Annotation(QObject):
 
         last_blobs_added = []
 
-        seg_mask = ndi.binary_fill_holes(seg_mask).astype(int)
+        # restrict the labeling to the bounding box of the segmented pixels
+        rows = np.flatnonzero(np.any(seg_mask, axis=1))
+        cols = np.flatnonzero(np.any(seg_mask, axis=0))
+        if rows.size == 0:
+            return last_blobs_added
+
+        seg_mask = seg_mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        map_pos_x = map_pos_x + cols[0]
+        map_pos_y = map_pos_y + rows[0]
+
+        # the mask can be boolean or uint8, no integer copy is needed for the labeling
+        seg_mask = ndi.binary_fill_holes(seg_mask)
         label_image = measure.label(seg_mask)
 
         area_th = area_mask * 0.2
@@ -164,13 +192,11 @@ class Annotation(QObject):
         return last_blobs_added
 
     def getFreeId(self):
-        used = []
-        for blob  in self.seg_blobs:
-            used.append(blob.id)
-        for id in range(len(used)):
+        used = {blob.id for blob in self.seg_blobs}
+        for id in range(len(self.seg_blobs)):
             if id not in used:
                 return id
-        return len(used)
+        return len(self.seg_blobs)
 
     def removeGroup(self, group):
 
@@ -285,6 +311,11 @@ class Annotation(QObject):
 
     #expect numpy img and mask
     def refineBorder(self, box, blob, img, depth, mask, grow, lastedit):
+        clippoints = self.refineClipPoints(box, blob, lastedit)
+        self.refineMask(img, depth, mask, clippoints, grow)
+        return self.blobsFromRefinedMask(box, blob, mask)
+
+    def refineClipPoints(self, box, blob, lastedit):
         clippoints = None
 
         if lastedit is not None:
@@ -295,6 +326,12 @@ class Annotation(QObject):
                     clippoints = np.append(clippoints, arc, axis=0)
                 origin = np.array([box[1], box[0]])
                 clippoints = clippoints - origin
+        return clippoints
+
+    def refineMask(self, img, depth, mask, clippoints, grow):
+        """
+        Refine the mask (in place) using Coraline. It works only on numpy arrays, so it can be run outside the GUI thread.
+        """
         try:
             from coraline.Coraline import segment
             segment(img, depth, mask, clippoints, 0.0, conservative=self.refine_conservative, grow=grow, radius=30, depth_weight = self.refine_depth_weight)
@@ -306,6 +343,7 @@ class Annotation(QObject):
             #msgBox.exec()
 #            return
 
+    def blobsFromRefinedMask(self, box, blob, mask):
         #TODO this should be moved to a function!
         area_th = 2
         created_blobs = []
@@ -319,14 +357,13 @@ class Annotation(QObject):
                 created_blobs.append(b)
         return created_blobs
 
-    def splitBlob(self,map, blob, seeds):
+    def splitBlob(self, map_array, blob, seeds):
 
         seeds = np.asarray(seeds)
         seeds = seeds.astype(int)
         mask = blob.getMask()
         box = blob.bbox
-        cropimg = utils.cropQImage(map, box)
-        cropimgnp = rgb2gray(utils.qimageToNumpyArray(cropimg))
+        cropimgnp = rgb2gray(utils.cropImage(map_array, box))
 
         edges = sobel(cropimgnp)
 
@@ -497,24 +534,36 @@ class Annotation(QObject):
         It returns the blob clicked with the smallest area (to avoid problems with overlapping blobs).
         """
 
-        blobs_clicked = []
+        return self.clickedBlobs(np.array([[x, y]]))[0]
 
+    def clickedBlobs(self, points):
+        """
+        Same as clickedBlob for several points (an array of x, y) tested with a single pass over the blobs.
+        It returns a list with the clicked blob (or None) of each point.
+        """
+
+        points = np.asarray(points)
+        xmin = points[:, 0].min()
+        ymin = points[:, 1].min()
+        xmax = points[:, 0].max()
+        ymax = points[:, 1].max()
+
+        selected_blobs = [None] * points.shape[0]
+        area_min = [100000000.0] * points.shape[0]
         for blob in self.seg_blobs:
 
-            point = np.array([[x, y]])
-            out = measure.points_in_poly(point, blob.contour)
-            if out[0] == True:
-                blobs_clicked.append(blob)
+            # bbox is (top, left, width, height), most of the blobs are discarded without testing the contour
+            box = blob.bbox
+            if xmax < box[1] or ymax < box[0] or xmin > box[1] + box[2] or ymin > box[0] + box[3]:
+                continue
 
-        area_min = 100000000.0
-        selected_blob = None
-        for i in range(len(blobs_clicked)):
-            blob = blobs_clicked[i]
-            if blob.area < area_min:
-                area_min = blob.area
-                selected_blob = blob
+            out = measure.points_in_poly(points, blob.contour)
+            for i in np.flatnonzero(out):
+                if blob.area < area_min[i]:
+                    area_min[i] = blob.area
+                    selected_blobs[i] = blob
 
-        return selected_blob
+        return selected_blobs
 
     ###########################################################################
     ### IMPORT / EXPORT
@@ -571,6 +620,13 @@ class Annotation(QObject):
         """
 
         qimg_label_map = QImage(filename)
+        return self.import_label_qimage(qimg_label_map, labels_info, w_target, h_target, create_holes)
+
+    def import_label_qimage(self, qimg_label_map, labels_info, w_target, h_target, create_holes=False):
+        """
+        Same as import_label_map, for a label map already in memory (QImage).
+        """
+
         qimg_label_map = qimg_label_map.convertToFormat(QImage.Format_RGB32)
 
         if w_target > 0 and h_target > 0:
@@ -604,7 +660,7 @@ class Annotation(QObject):
                         blob.class_name = label_name
                         blob.class_color = c
                         break
-                if create_holes or blob.class_name is not 'Empty':
+                if create_holes or blob.class_name != 'Empty':
                     created_blobs.append(blob)
 
         return created_blobs
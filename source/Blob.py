@@ -301,33 +301,22 @@ class Blob(object):
                         coordinates = np.array(contour)
                         self.inner_contours.append(coordinates)
 
-            # adjust the coordinates of the outer contour
+            # adjust the coordinates of the outer contour, (row, col) -> (x, y)
             # (NOTE THAT THE COORDINATES OF THE BBOX ARE IN THE GLOBAL MAP COORDINATES SYSTEM)
-            for i in range(self.contour.shape[0]):
-                ycoor = self.contour[i, 0]
-                xcoor = self.contour[i, 1]
-                self.contour[i, 0] = xcoor - PADDED_SIZE + bbox[1]
-                self.contour[i, 1] = ycoor - PADDED_SIZE + bbox[0]
+            offset = [bbox[1] - PADDED_SIZE, bbox[0] - PADDED_SIZE]
+            self.contour = self.contour[:, ::-1] + offset
 
             # adjust coordinates of the INNER contours
-            for j, contour in enumerate(self.inner_contours):
-                for i in range(contour.shape[0]):
-                    ycoor = contour[i, 0]
-                    xcoor = contour[i, 1]
-                    self.inner_contours[j][i, 0] = xcoor - PADDED_SIZE + bbox[1]
-                    self.inner_contours[j][i, 1] = ycoor - PADDED_SIZE + bbox[0]
+            self.inner_contours = [contour[:, ::-1] + offset for contour in self.inner_contours]
         elif number_of_contours == 1:
 
             coords = measure.approximate_polygon(contours[0], tolerance=0.2)
             self.contour = np.array(coords)
 
-            # adjust the coordinates of the outer contour
+            # adjust the coordinates of the outer contour, (row, col) -> (x, y)
             # (NOTE THAT THE COORDINATES OF THE BBOX ARE IN THE GLOBAL MAP COORDINATES SYSTEM)
-            for i in range(self.contour.shape[0]):
-                ycoor = self.contour[i, 0]
-                xcoor = self.contour[i, 1]
-                self.contour[i, 0] = xcoor - PADDED_SIZE + bbox[1]
-                self.contour[i, 1] = ycoor - PADDED_SIZE + bbox[0]
+            offset = [bbox[1] - PADDED_SIZE, bbox[0] - PADDED_SIZE]
+            self.contour = self.contour[:, ::-1] + offset
         else:
             raise Exception("Empty contour")
         #TODO optimize the bbox
@@ -411,39 +400,36 @@ class Blob(object):
         # QPolygon to draw the blob
         #working with mask the center of the pixels is in 0, 0
         #if drawing the center of the pixel is 0.5, 0.5
-        qpolygon = QPolygonF()
-        for i in range(self.contour.shape[0]):
-            qpolygon << QPointF(self.contour[i, 0] + 0.5, self.contour[i, 1] + 0.5)
+        # the points are converted to python floats in one shot, indexing numpy arrays point by point is slow
+        points = (self.contour[:, :2] + 0.5).tolist()
+        qpolygon = QPolygonF([QPointF(x, y) for x, y in points])
 
         self.qpath = QPainterPath()
         self.qpath.addPolygon(qpolygon)
 
-        for inner_contour in self.inner_contours:
-            qpoly_inner = QPolygonF()
-            for i in range(inner_contour.shape[0]):
-                qpoly_inner << QPointF(inner_contour[i, 0], inner_contour[i, 1])
-
+        # holes are collected in a single path and subtracted once
+        if len(self.inner_contours) > 0:
             path_inner = QPainterPath()
-            path_inner.addPolygon(qpoly_inner)
+            for inner_contour in self.inner_contours:
+                points = inner_contour[:, :2].tolist()
+                path_inner.addPolygon(QPolygonF([QPointF(x, y) for x, y in points]))
             self.qpath = self.qpath.subtracted(path_inner)
 
     def createQPixmapFromMask(self):
 
         w = self.bbox[2]
         h = self.bbox[3]
-        self.qimg_mask = QImage(w, h, QImage.Format_ARGB32)
-        self.qimg_mask.fill(qRgba(0, 0, 0, 0))
 
+        # ARGB values
         if self.class_name == "Empty":
-            rgba = qRgba(255, 255, 255, 255)
+            argb = [255, 255, 255, 255]
         else:
-            rgba = qRgba(self.class_color[0], self.class_color[1], self.class_color[2], 100)
+            argb = [100, self.class_color[0], self.class_color[1], self.class_color[2]]
 
         blob_mask = self.getMask()
-        for x in range(w):
-            for y in range(h):
-                if blob_mask[y, x] == 1:
-                    self.qimg_mask.setPixel(x, y, rgba)
+        img = np.zeros((h, w, 4), dtype=np.uint8)
+        img[blob_mask == 1] = argb
+        self.qimg_mask = utils.rgbToQImage(img)
 
         self.pxmap_mask = QPixmap.fromImage(self.qimg_mask)
 
@@ -460,23 +446,9 @@ class Blob(object):
 
         #self.perimeter = measure.perimeter(mask) instead?
 
-
-        # perimeter of the outer contour
-        px1 = contour[0, 0]
-        py1 = contour[0, 1]
-        N = contour.shape[0]
-        pxlast = contour[N-1, 0]
-        pylast = contour[N-1, 1]
-        perim = math.sqrt((px1-pxlast)*(px1-pxlast) + (py1-pylast)*(py1-pylast))
-        for i in range(1, contour.shape[0]):
-            px2 = contour[i, 0]
-            py2 = contour[i, 1]
-
-            d = math.sqrt((px1 - px2)*(px1-px2) + (py1-py2)*(py1-py2))
-            perim += d
-
-            px1 = px2
-            py1 = py2
+        # perimeter of the closed contour (the last segment joins the last point to the first one)
+        d = np.diff(contour[:, :2], axis=0, append=contour[:1, :2])
+        perim = float(np.sum(np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1])))
 
         return perim
 
@@ -17,6 +17,7 @@
 #GNU General Public License (http://www.gnu.org/licenses/gpl.txt)
 # for more details.
 
+from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QImage
 import rasterio as rio
 from source import utils
@@ -49,5 +50,19 @@ class Channel(object):
 
         return self.qimage
 
+    def thumbnail(self, size):
+        """
+        Return a QImage of the channel scaled to fit a size x size square (the channel is loaded if needed).
+        """
+
+        if self.qimage is None:
+            self.loadData()
+
+        # a fast reduction to about twice the target size followed by a smooth one on the smaller image
+        img = self.qimage
+        if img.width() > 2 * size or img.height() > 2 * size:
+            img = img.scaled(2 * size, 2 * size, Qt.KeepAspectRatio, Qt.FastTransformation)
+        return img.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
     def save(self):
         return { "filename": self.filename, "type": self.type }
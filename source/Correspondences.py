@@ -360,6 +360,7 @@ class Correspondences(object):
         for j in range(0, len(self.correspondences)):
             existing.append(int(self.correspondences[j][0]))
 
+        existing = set(existing)
         missing = [i for i in all_blobs if i not in existing]
 
         for id in missing:
@@ -385,6 +386,7 @@ class Correspondences(object):
         for j in range(0, len(self.correspondences)):
             existing.append(int(self.correspondences[j][1]))
 
+        existing = set(existing)
         missing = [i for i in all_blobs if i not in existing]
 
         for id in missing:
@@ -21,10 +21,12 @@ class Image(object):
         self.height = height                        #in pixels!
 
         self.annotations = Annotation()
-        for data in annotations:
+        blobs = [None] * len(annotations)
+        for i, data in enumerate(annotations):
             blob = Blob(None, 0, 0, 0)
             blob.fromDict(data)
-            self.annotations.addBlob(blob)
+            blobs[i] = blob
+        self.annotations.addBlobs(blobs)
 
         self.channels = list(map(lambda c: Channel(**c), channels))
 
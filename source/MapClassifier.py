@@ -31,7 +31,7 @@ from models.dataloaders import helpers as helpers
 # DEEPLAB V3+
 from models.deeplab import DeepLab
 
-from PyQt5.QtCore import QCoreApplication, Qt, QObject, pyqtSlot, pyqtSignal
+from PyQt5.QtCore import QCoreApplication, QThread, Qt, QObject, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QPainter, QImage, QColor, QPixmap, qRgb, qRed, qGreen, qBlue
 
 from source import utils
@@ -73,6 +73,10 @@ class MapClassifier(QObject):
         self.total_processing_steps = 0
         self.scores = None
 
+        # final label map (QImage), see assembleTiles
+        self.label_map = None
+        self.save_label_map = False
+
         self.scale_factor = 1.0
         self.input_image = None
         self.padding = 0
@@ -114,13 +118,34 @@ class MapClassifier(QObject):
         width = int(max(513, working_area[2]) + (2*self.padding)/self.scale_factor)
         height = int(max(513, working_area[3]) + (2*self.padding)/self.scale_factor)
 
-        # crop the input image
-        crop_image = img_map.copy(left, top, width, height)
-
-        # rescale the input image
-        w_target = crop_image.width() * self.scale_factor
-        h_target = crop_image.height() * self.scale_factor
-        self.input_image = crop_image.scaled(w_target, h_target, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        crop_box = [top, left, width, height]
+
+        # rescale the input image; the image is converted once, the tiles are cropped from the numpy array
+        ratio = 1.0 / self.scale_factor
+        k = int(round(ratio))
+        if abs(self.scale_factor - 1.0) < 0.01:
+            # (almost) identity, no rescaling, the crop is taken from the numpy view of the map
+            self.scale_factor = 1.0
+            self.input_image = None
+            self.input_array = utils.cropImage(utils.qimageToNumpyView(img_map), crop_box)
+        elif k > 1 and abs(ratio - k) < 0.01:
+            # integer downscaling, block averaging of k x k pixels
+            self.scale_factor = 1.0 / k
+            self.input_image = None
+            arr = utils.cropImage(utils.qimageToNumpyView(img_map), crop_box)
+            h = (arr.shape[0] // k) * k
+            w = (arr.shape[1] // k) * k
+            blocks = arr[:h, :w].reshape(h // k, k, w // k, k, 3).mean(axis=(1, 3))
+            self.input_array = (blocks + 0.5).astype(np.uint8)
+        else:
+            crop_image = img_map.copy(left, top, width, height)
+            w_target = crop_image.width() * self.scale_factor
+            h_target = crop_image.height() * self.scale_factor
+            self.input_image = crop_image.scaled(w_target, h_target, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            self.input_array = utils.qimageToNumpyArray(self.input_image)
+
+        h_target = self.input_array.shape[0]
+        w_target = self.input_array.shape[1]
 
         self.wa_top = self.padding
         self.wa_left = self.padding
@@ -176,8 +201,7 @@ class MapClassifier(QObject):
 
                         top = self.wa_top - DELTA_CROP + row * AGGREGATION_WINDOW_SIZE + i * AGGREGATION_STEP
                         left = self.wa_left - DELTA_CROP + col * AGGREGATION_WINDOW_SIZE + j * AGGREGATION_STEP
-                        tileimg = utils.cropQImage(self.input_image, [top, left, TILE_SIZE, TILE_SIZE])
-                        img_np = utils.qimageToNumpyArray(tileimg)
+                        img_np = utils.cropImage(self.input_array, [top, left, TILE_SIZE, TILE_SIZE])
 
                         img_np = img_np.astype(np.float32)
                         img_np = img_np / 255.0
@@ -205,7 +229,7 @@ class MapClassifier(QObject):
 
                             self.processing_step += 1
                             self.updateProgress.emit( (100.0 * self.processing_step) / self.total_processing_steps )
-                            QCoreApplication.processEvents()
+                            self.processEvents()
 
                 if self.flagStopProcessing is True:
                     break
@@ -233,7 +257,7 @@ class MapClassifier(QObject):
 
                 self.processing_step += 1
                 self.updateProgress.emit( (100.0 * self.processing_step) / self.total_processing_steps )
-                QCoreApplication.processEvents()
+                self.processEvents()
 
         self.assembleTiles(tile_rows, tile_cols, AGGREGATION_WINDOW_SIZE, ass_scores= save_scores)
         torch.cuda.empty_cache()
@@ -307,8 +331,11 @@ class MapClassifier(QObject):
         # the classified area can exceed the working area
         qimgworkingarea = qimglabel.copy(0, 0, self.wa_width, self.wa_height)
 
-        labelfile = os.path.join(self.temp_dir, "labelmap.png")
-        qimgworkingarea.save(labelfile)
+        # the label map is kept in memory for the import, the file is written only for debugging
+        self.label_map = qimgworkingarea
+        if self.save_label_map:
+            labelfile = os.path.join(self.temp_dir, "labelmap.png")
+            qimgworkingarea.save(labelfile)
 
     def classify(self, tresh):
         """
@@ -342,6 +369,14 @@ class MapClassifier(QObject):
 
         self.flagStopProcessing = True
 
+    def processEvents(self):
+        """
+        Keep the GUI responsive when the classifier runs in the GUI thread. In a worker thread (see TagLab.applyClassifier)
+        the progress reaches the GUI through the (queued) updateProgress signal and nothing needs to be done.
+        """
+        if QThread.currentThread() == self.thread():
+            QCoreApplication.processEvents()
+
     def aggregateScores(self, scores, tile_sz, center_window_size, step):
         """
         Calcute the classification scores using a Bayesian fusion aggregation.
@@ -393,7 +428,7 @@ class MapClassifier(QObject):
 
                 self.processing_step += 1
                 self.updateProgress.emit( (100.0 * self.processing_step) / self.total_processing_steps )
-                QCoreApplication.processEvents()
+                self.processEvents()
 
         #####   AGGREGATE SCORES BY AVERAGING THEM   ##################################################
 
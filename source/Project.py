@@ -16,6 +16,10 @@ from source.Correspondences import Correspondences
 from source.Genet import Genet
 from source import utils
 
+# brushes are shared by all the blobs with the same fill color
+brushes_cache = {}
+empty_brush = QBrush()
+
 
 def loadProject(taglab_working_dir, filename, labels_dict):
 
@@ -99,11 +103,13 @@ def loadOldProject(taglab_working_dir, data, labels_dict):
     channel = Channel(filename=map_filename, type="RGB")
     image.channels.append(channel)
 
+    blobs = []
     for blob_data in data["Segmentation Data"]:
         blob = Blob(None, 0, 0, 0)
         blob.fromDict(blob_data)
         blob.setId(int(blob.id))  # id should be set again to update related info
-        image.annotations.addBlob(blob)
+        blobs.append(blob)
+    image.annotations.addBlobs(blobs)
 
     project.images.append(image)
     return project
@@ -127,6 +133,36 @@ class ProjectEncoder(json.JSONEncoder):
 
         return json.JSONEncoder.default(self, obj)
 
+def snapshot(obj, encoder=ProjectEncoder()):
+    """
+    Convert the project data to plain dicts and lists (the same content json.dumps writes with ProjectEncoder).
+    The copy does not share mutable data with the project, so it can be written outside the GUI thread.
+    """
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    # the contours and the tables are already fresh lists (tolist()), only the shared leaves are copied
+    if isinstance(obj, Blob):
+        data = obj.save()
+        data["class color"] = list(data["class color"])
+        return data
+    if isinstance(obj, Correspondences):
+        return obj.save()
+    if isinstance(obj, dict):
+        return { key: snapshot(value, encoder) for key, value in obj.items() }
+    if isinstance(obj, (list, tuple)):
+        return [snapshot(value, encoder) for value in obj]
+    return snapshot(encoder.default(obj), encoder)
+
+def saveSnapshot(data, filename):
+    """
+    Write a snapshot of the project (see snapshot), it can be run outside the GUI thread.
+    The data are written to a temporary file first, so an interrupted save never leaves a truncated project.
+    """
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w") as f:
+        f.write(json.dumps(data))
+    os.replace(tmp_filename, filename)
+
 class Project(object):
 
     def __init__(self, filename=None, labels={}, images=[], correspondences=None,
@@ -170,28 +206,32 @@ class Project(object):
     def save(self, filename = None):
         #try:
         data = self.__dict__
-        str = json.dumps(data, cls=ProjectEncoder, indent=1)
+        # no indentation: json uses its C encoder only when indent is None
+        str = json.dumps(data, cls=ProjectEncoder)
 
         if filename is None:
             filename = self.filename
-        f = open(filename, "w")
-        f.write(str)
-        f.close()
+        with open(filename, "w") as f:
+            f.write(str)
         #except Exception as a:
         #    print(str(a))
 
 
     def classBrushFromName(self, blob):
-        brush = QBrush()
         if blob.class_name == "Empty":
-            return brush
+            return empty_brush
 
         if not blob.class_name in self.labels:
             print("Missing label for " + blob.class_name + ". Creating one.")
             self.labels[blob.class_name] = Label(blob.class_name, blob.class_name, fill = [255, 0, 0])
 
+        # the key is the color, so a change of the label color does not need any invalidation
         color = self.labels[blob.class_name].fill
-        brush = QBrush(QColor(color[0], color[1], color[2], 200))
+        key = (color[0], color[1], color[2])
+        brush = brushes_cache.get(key)
+        if brush is None:
+            brush = QBrush(QColor(color[0], color[1], color[2], 200))
+            brushes_cache[key] = brush
         return brush
 
     def isLabelVisible(self, id):
@@ -238,6 +278,16 @@ class Project(object):
         for corr in self.findCorrespondences(image):
             corr.addBlob(image, blob)
 
+    def addBlobs(self, image, blobs):
+
+        # update image annotations
+        image.annotations.addBlobs(blobs)
+
+        # update correspondences
+        for corr in self.findCorrespondences(image):
+            for blob in blobs:
+                corr.addBlob(image, blob)
+
     def removeBlob(self, image, blob):
 
         # updata image annotations
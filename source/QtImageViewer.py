@@ -3,6 +3,8 @@ from PyQt5.QtCore import Qt, QPointF, QRectF, QFileInfo, QDir, pyqtSlot, pyqtSig
 from PyQt5.QtGui import QImage, QPixmap, QPainter, QPainterPath, QPen, QImageReader
 from PyQt5.QtWidgets import QApplication, QGraphicsView, QGraphicsScene, QFileDialog, QGraphicsPixmapItem
 
+from source import utils
+
 class QtImageViewer(QGraphicsView):
     """
     PyQt image viewer widget w
@@ -25,10 +27,15 @@ class QtImageViewer(QGraphicsView):
         self.scene.addItem(self.pixmapitem)
 
         self.img_map = None
+        # numpy view of img_map, see imgMapArray
+        self.img_map_array = None
         # current image size
         self.imgwidth = 0
         self.imgheight = 0
 
+        # visible area in scene coordinates, updated by viewChanged
+        self.scene_view = QRectF()
+
         # Image aspect ratio mode.
         self.aspectRatioMode = Qt.KeepAspectRatio
 
@@ -72,6 +79,7 @@ class QtImageViewer(QGraphicsView):
         """
 
         self.img_map = img
+        self.img_map_array = None
         if type(img) is QImage:
             imageARGB32 = img.convertToFormat(QImage.Format_ARGB32)
             self.pixmap = QPixmap.fromImage(imageARGB32)
@@ -105,7 +113,8 @@ class QtImageViewer(QGraphicsView):
     def viewChanged(self):
         if not self.imgwidth:
             return
-        rect = self.viewportToScenePercent()
+        self.scene_view = self.viewportToScene()
+        rect = self.viewportToScenePercent(self.scene_view)
         self.viewUpdated.emit(rect)
         posx = self.horizontalScrollBar().value() 
         posy = self.verticalScrollBar().value() 
@@ -130,9 +139,18 @@ class QtImageViewer(QGraphicsView):
         self.scale(self.zoom_factor, self.zoom_factor)
         self.invalidateScene()
 
+    def imgMapArray(self):
+        """
+        Numpy (RGB) view of the image map, built once and shared by the crops of the tools and of the classifier.
+        """
+        if self.img_map_array is None and self.img_map is not None:
+            self.img_map_array = utils.qimageToNumpyView(self.img_map)
+        return self.img_map_array
+
     def clear(self):
         self.pixmapitem.setPixmap(QPixmap())
         self.img_map = None
+        self.img_map_array = None
 
     def disableScrollBars(self):
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -157,8 +175,8 @@ class QtImageViewer(QGraphicsView):
         bottomright = self.mapToScene(self.viewport().rect().bottomRight())
         return QRectF(topleft, bottomright)
 
-    def viewportToScenePercent(self):
-        view = self.viewportToScene()
+    def viewportToScenePercent(self, view=None):
+        view = QRectF(self.viewportToScene() if view is None else view)
         view.setCoords(view.left()/self.imgwidth, view.top()/self.imgheight,
                     view.right()/self.imgwidth, view.bottom()/self.imgheight)
         return view
@@ -166,8 +184,8 @@ class QtImageViewer(QGraphicsView):
     def clampCoords(self, x, y):
 
         if self.img_map is not None:
-            xc = max(0, min(int(x), self.img_map.width()))
-            yc = max(0, min(int(y), self.img_map.height()))
+            xc = max(0, min(int(x), self.imgwidth))
+            yc = max(0, min(int(y), self.imgheight))
         else:
             xc = 0
             yc = 0
@@ -199,16 +217,8 @@ class QtImageViewer(QGraphicsView):
 
 
     def clipScenePos(self, scenePosition):
-        posx = scenePosition.x()
-        posy = scenePosition.y()
-        if posx < 0:
-            posx = 0
-        if posy < 0:
-            posy = 0
-        if posx > self.imgwidth:
-            posx = self.imgwidth
-        if posy > self.imgheight:
-            posy = self.imgheight
+        posx = max(0, min(scenePosition.x(), self.imgwidth))
+        posy = max(0, min(scenePosition.y(), self.imgheight))
 
         return [round(posx), round(posy)]
 
@@ -224,17 +234,14 @@ class QtImageViewer(QGraphicsView):
 
         zf = self.zoom_factor
 
-        xmap = float(self.img_map.width()) * x
-        ymap = float(self.img_map.height()) * y
+        xmap = float(self.imgwidth) * x
+        ymap = float(self.imgheight) * y
 
         view = self.viewportToScene()
         (w, h) = (view.width(), view.height())
 
-        posx = max(0, xmap - w / 2)
-        posy = max(0, ymap - h / 2)
-
-        posx = min(posx, self.img_map.width() - w / 2)
-        posy = min(posy, self.img_map.height() - h / 2)
+        posx = min(max(0, xmap - w / 2), self.imgwidth - w / 2)
+        posy = min(max(0, ymap - h / 2), self.imgheight - h / 2)
 
         self.horizontalScrollBar().setValue(posx * zf)
         self.verticalScrollBar().setValue(posy * zf)
@@ -22,9 +22,9 @@
 """
 
 import os.path
-from PyQt5.QtCore import Qt, QPointF, QRectF, QFileInfo, QDir, pyqtSlot, pyqtSignal, QT_VERSION_STR
-from PyQt5.QtGui import QImage, QPixmap, QPainter, QPainterPath, QPen, QImageReader, QFont
-from PyQt5.QtWidgets import QApplication, QGraphicsView, QGraphicsScene, QFileDialog, QGraphicsItem, QGraphicsSimpleTextItem
+from PyQt5.QtCore import Qt, QPointF, QRectF, QFileInfo, QDir, QTimer, pyqtSlot, pyqtSignal, QT_VERSION_STR
+from PyQt5.QtGui import QImage, QPixmap, QPixmapCache, QOpenGLContext, QPainter, QPainterPath, QPen, QBrush, QImageReader, QFont, QTransform
+from PyQt5.QtWidgets import QApplication, QGraphicsView, QGraphicsScene, QFileDialog, QGraphicsItem, QGraphicsSimpleTextItem, QOpenGLWidget
 
 from source.Undo import Undo
 from source.Project import Project
@@ -37,6 +37,7 @@ from source.Label import Label
 from source.QtImageViewer import QtImageViewer
 
 import random as rnd
+from contextlib import contextmanager
 
 #note on ZValue:
 # 0: image
@@ -98,6 +99,8 @@ class QtImageViewerPlus(QtImageViewer):
         self.channel = None
         self.annotations = Annotation()
         self.selected_blobs = []
+        self.selected_set = set()   # same blobs of selected_blobs, for fast membership tests
+        self.visibility_of_class = {}   # visibility of the classes at the last updateVisibility
         self.taglab_dir = taglab_dir
         self.tools = Tools(self)
         self.tools.createTools()
@@ -113,6 +116,18 @@ class QtImageViewerPlus(QtImageViewer):
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
 
+        # the whole viewport is repainted at each update, Qt does not have to compute the exposed region of
+        # thousands of blobs
+        self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+
+        # the blob items are spatially indexed, the ones outside the exposed area are culled at repaint
+        self.scene.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+
+        # the map and the blobs can be composited by the GPU setting TAGLAB_OPENGL=1 (see README), the raster
+        # viewport is kept if no OpenGL context can be created
+        if os.environ.get("TAGLAB_OPENGL") == "1" and self.openGLAvailable():
+            self.setViewport(QOpenGLWidget())
+
 
         # DRAWING SETTINGS
         self.border_pen = QPen(Qt.black, 3)
@@ -121,11 +136,28 @@ class QtImageViewerPlus(QtImageViewer):
         self.border_pen.setCosmetic(True)
         self.border_selected_pen = QPen(Qt.white, 3)
         self.border_selected_pen.setCosmetic(True)
+        self.crossair_pen = QPen(Qt.white, 1)
+        self.crossair_pen.setCosmetic(True)
+        self.id_font = QFont("Calibri", 12, QFont.Bold)
+        self.id_brush = QBrush(Qt.white)
+
+        self.transparency_value = 1.0
+
+        # when a group of blob changes is ongoing the viewport is updated only once at the end
+        self.batch_level = 0
+        self.pending_invalidate = False
+        self.pending_selection_changed = False
 
         self.showCrossair = False
         self.mouseCoords = QPointF(0, 0)
         self.crackWidget = None
 
+        # the crossair is redrawn at most once per frame
+        self.crossair_timer = QTimer(self)
+        self.crossair_timer.setSingleShot(True)
+        self.crossair_timer.setInterval(16)
+        self.crossair_timer.timeout.connect(self.updateCrossair)
+
         self.setContextMenuPolicy(Qt.CustomContextMenu)
 
         self.refine_grow = 0.0 #maybe should in in tools
@@ -146,10 +178,13 @@ class QtImageViewerPlus(QtImageViewer):
         self.image = image
         self.annotations = image.annotations
         self.selected_blobs = []
+        self.selected_set = set()
+        self.visibility_of_class = {}
         self.selectionChanged.emit()
 
         for blob in self.annotations.seg_blobs:
             self.drawBlob(blob)
+        self.updatePixmapCacheLimit()
 
         self.scene.invalidate()
 
@@ -212,6 +247,8 @@ class QtImageViewerPlus(QtImageViewer):
 
         QtImageViewer.clear(self)
         self.selected_blobs = []
+        self.selected_set = set()
+        self.visibility_of_class = {}
         self.selectionChanged.emit()
         self.undo_data = Undo()
 
@@ -222,7 +259,7 @@ class QtImageViewerPlus(QtImageViewer):
         self.annotations = Annotation()
 
 
-    def drawBlob(self, blob, prev=False):
+    def drawBlob(self, blob):
         # if it has just been created remove the current graphics item in order to set it again
         if blob.qpath_gitem is not None:
             self.scene.removeItem(blob.qpath_gitem)
@@ -234,28 +271,44 @@ class QtImageViewerPlus(QtImageViewer):
 
         blob.setupForDrawing()
 
-        if prev is True:
-            pen = self.border_pen_for_appended_blobs
-        else:
-            pen = self.border_selected_pen if blob in self.selected_blobs else self.border_pen
+        pen = self.border_selected_pen if self.isSelected(blob) else self.border_pen
         brush = self.project.classBrushFromName(blob)
 
         blob.qpath_gitem = self.scene.addPath(blob.qpath, pen, brush)
         blob.qpath_gitem.setZValue(1)
+        blob.qpath_gitem.setOpacity(self.transparency_value)
 
-        font_size = 12
-        blob.id_item = TextItem(str(blob.id),  QFont("Calibri", font_size, QFont.Bold))
+        blob.id_item = TextItem(str(blob.id), self.id_font)
         self.scene.addItem(blob.id_item)
         blob.id_item.setPos(blob.centroid[0], blob.centroid[1])
         blob.id_item.setTransformOriginPoint(QPointF(blob.centroid[0] + 14.0, blob.centroid[1] + 14.0))
         blob.id_item.setZValue(2)
-        blob.id_item.setBrush(Qt.white)
+        blob.id_item.setBrush(self.id_brush)
         blob.id_item.setOpacity(0.8)
+        # the id keeps its size on screen, so its cached pixmap survives the zoom changes
+        blob.id_item.setFlag(QGraphicsItem.ItemIgnoresTransformations)
+        blob.id_item.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
 
         #blob.id_item.setDefaultTextColor(Qt.white)
-        #blob.id_item.setFlag(QGraphicsItem.ItemIgnoresTransformations)
-        #blob.qpath_gitem.setOpacity(self.transparency_value)
 
+        self.applyClassVisibility(blob)
+
+
+    def openGLAvailable(self):
+        """
+        Check that a valid OpenGL context can be created (missing or broken drivers, remote desktops).
+        """
+        context = QOpenGLContext()
+        return context.create() and context.isValid()
+
+    def updatePixmapCacheLimit(self):
+        """
+        The cached pixmaps of the blob ids are stored in the QPixmapCache, its limit (in KB) is raised so that
+        all of them fit (a few KB for each id).
+        """
+        needed = 4 * len(self.annotations.seg_blobs)
+        if needed > QPixmapCache.cacheLimit():
+            QPixmapCache.setCacheLimit(needed)
 
     def undrawBlob(self, blob):
         self.scene.removeItem(blob.qpath_gitem)
@@ -263,22 +316,54 @@ class QtImageViewerPlus(QtImageViewer):
         blob.qpath = None
         blob.qpath_gitem = None
         blob.id_item = None
-        self.scene.invalidate()
+        self.invalidateBlobs()
+
+    @contextmanager
+    def batchUpdates(self):
+        """
+        Group several blob changes (add, remove, selection, class) so that the viewport is updated,
+        and selectionChanged emitted, only once.
+        Usage: with viewerplus.batchUpdates(): ...
+        """
+        self.batch_level += 1
+        try:
+            yield
+        finally:
+            self.batch_level -= 1
+            if self.batch_level == 0:
+                if self.pending_invalidate:
+                    self.pending_invalidate = False
+                    self.viewport().update()
+                if self.pending_selection_changed:
+                    self.pending_selection_changed = False
+                    self.selectionChanged.emit()
+
+    def invalidateBlobs(self):
+        # with FullViewportUpdate a partial invalidation of the scene is pointless
+        if self.batch_level > 0:
+            self.pending_invalidate = True
+        else:
+            self.viewport().update()
+
+    def notifySelectionChanged(self):
+        if self.batch_level > 0:
+            self.pending_selection_changed = True
+        else:
+            self.selectionChanged.emit()
 
 
     def applyTransparency(self, value):
         self.transparency_value = value / 100.0
-        # current annotations
+        # current annotations (hidden blobs get the opacity when they are shown again)
         for blob in self.annotations.seg_blobs:
-            blob.qpath_gitem.setOpacity(self.transparency_value)
+            if blob.qpath_gitem is not None and blob.qpath_gitem.isVisible():
+                blob.qpath_gitem.setOpacity(self.transparency_value)
 
     #used for crossair cursor
     def drawForeground(self, painter, rect):
         if self.showCrossair:
             painter.setClipRect(rect)
-            pen = QPen(Qt.white, 1)
-            pen.setCosmetic(True)
-            painter.setPen(pen)
+            painter.setPen(self.crossair_pen)
             painter.drawLine(self.mouseCoords.x(), rect.top(), self.mouseCoords.x(), rect.bottom())
             painter.drawLine(rect.left(), self.mouseCoords.y(), rect.right(), self.mouseCoords.y())
 
@@ -332,9 +417,9 @@ class QtImageViewerPlus(QtImageViewer):
 
 #TODO not necessarily a slot
     @pyqtSlot(float, float)
-    def selectOp(self, x, y):
+    def selectOp(self, x, y, mods=None):
         """
-        Selection operation.
+        Selection operation. The keyboard modifiers are taken from the mouse event when available.
         """
 
         self.logfile.info("[SELECTION][DOUBLE-CLICK] Selection starts..")
@@ -342,13 +427,16 @@ class QtImageViewerPlus(QtImageViewer):
         if self.tools.tool in ["RULER", "DEEPEXTREME"]:
             return
 
-        if not (Qt.ShiftModifier & QApplication.queryKeyboardModifiers()):
+        if mods is None:
+            mods = QApplication.keyboardModifiers()
+
+        if not (Qt.ShiftModifier & mods):
             self.resetSelection()
 
         selected_blob = self.annotations.clickedBlob(x, y)
 
         if selected_blob:
-            if selected_blob in self.selected_blobs:
+            if self.isSelected(selected_blob):
                 self.removeFromSelectedList(selected_blob)
             else:
                 self.addToSelectedList(selected_blob)
@@ -411,7 +499,7 @@ class QtImageViewerPlus(QtImageViewer):
 
             if self.dragSelectionStart:
                 if abs(x - self.dragSelectionStart[0]) < 5 and abs(y - self.dragSelectionStart[1]) < 5:
-                    self.selectOp(x, y)
+                    self.selectOp(x, y, event.modifiers())
                 else:
                     self.dragSelectBlobs(x, y)
                     self.dragSelectionStart = None
@@ -424,6 +512,10 @@ class QtImageViewerPlus(QtImageViewer):
             else:
                 self.tools.leftReleased(x, y)
 
+    @pyqtSlot()
+    def updateCrossair(self):
+        self.scene.invalidate(self.sceneRect(), QGraphicsScene.ForegroundLayer)
+
     def mouseMoveEvent(self, event):
 
         QGraphicsView.mouseMoveEvent(self, event)
@@ -433,7 +525,8 @@ class QtImageViewerPlus(QtImageViewer):
 
         if self.showCrossair == True:
             self.mouseCoords = scenePos
-            self.scene.invalidate(self.sceneRect(), QGraphicsScene.ForegroundLayer)
+            if not self.crossair_timer.isActive():
+                self.crossair_timer.start()
 
         if event.buttons() == Qt.LeftButton:
             (x, y) = self.clipScenePos(scenePos)
@@ -446,7 +539,7 @@ class QtImageViewerPlus(QtImageViewer):
                 self.dragSelectionRect.setRect(start[0], start[1], x - start[0], y - start[1])
                 return
 
-            if Qt.ControlModifier & QApplication.queryKeyboardModifiers():
+            if Qt.ControlModifier & event.modifiers():
                 return
 
             self.tools.mouseMove(x, y)
@@ -457,7 +550,7 @@ class QtImageViewerPlus(QtImageViewer):
         scenePos = self.mapToScene(event.pos())
 
         if event.button() == Qt.LeftButton:
-            self.selectOp(scenePos.x(), scenePos.y())
+            self.selectOp(scenePos.x(), scenePos.y(), event.modifiers())
 
 
     def wheelEvent(self, event):
@@ -473,11 +566,6 @@ class QtImageViewerPlus(QtImageViewer):
 
         if self.zoomEnabled:
 
-            view_pos = event.pos()
-            scene_pos = self.mapToScene(view_pos)
-            self.centerOn(scene_pos)
-
-
             pt = event.angleDelta()
 
             #uniform zoom.
@@ -487,13 +575,8 @@ class QtImageViewerPlus(QtImageViewer):
             if self.zoom_factor > self.ZOOM_FACTOR_MAX:
                 self.zoom_factor = self.ZOOM_FACTOR_MAX
 
-            self.resetTransform()
-            self.scale(self.zoom_factor, self.zoom_factor)
-
-            delta = self.mapToScene(view_pos) - self.mapToScene(self.viewport().rect().center())
-            self.centerOn(scene_pos - delta)
-
-            self.invalidateScene()
+            # the point under the mouse stays fixed (AnchorUnderMouse), the view is updated by setTransform
+            self.setTransform(QTransform.fromScale(self.zoom_factor, self.zoom_factor))
             #self.updateViewer()
 
         # PAY ATTENTION !! THE WHEEL INTERACT ALSO WITH THE SCROLL BAR !!
@@ -504,16 +587,24 @@ class QtImageViewerPlus(QtImageViewer):
     def dragSelectBlobs(self, x, y):
         sx = self.dragSelectionStart[0]
         sy = self.dragSelectionStart[1]
-        self.resetSelection()
-        for blob in self.annotations.seg_blobs:
-            visible = self.project.isLabelVisible(blob.class_name)
-            if not visible:
-                continue
-            box = blob.bbox
+        with self.batchUpdates():
+            self.resetSelection()
 
-            if sx > box[1] or sy > box[0] or x < box[1] + box[2] or y < box[0] + box[3]:
-                continue
-            self.addToSelectedList(blob)
+            # the bounding boxes of all the blobs are tested, also the transparent ones and the ones hidden
+            # by setBlobVisible; the visibility of each class is queried only once
+            visibility_of_class = {}
+            for blob in self.annotations.seg_blobs:
+                visible = visibility_of_class.get(blob.class_name)
+                if visible is None:
+                    visible = self.project.isLabelVisible(blob.class_name)
+                    visibility_of_class[blob.class_name] = visible
+                if not visible:
+                    continue
+                box = blob.bbox
+
+                if sx > box[1] or sy > box[0] or x < box[1] + box[2] or y < box[0] + box[3]:
+                    continue
+                self.addToSelectedList(blob)
 
     @pyqtSlot(str)
     def setActiveLabel(self, label):
@@ -534,27 +625,65 @@ class QtImageViewerPlus(QtImageViewer):
         if blob.id_item is not None:
             blob.id_item.setVisible(visibility)
 
-    def updateVisibility(self):
+    def applyClassVisibility(self, blob):
+        """
+        Show/hide a single blob according to the visibility of its class (new blobs and class changes), so that
+        updateVisibility(changed_labels_only=True) can skip the blobs of the classes that were not toggled.
+        """
+        visibility = self.project.isLabelVisible(blob.class_name)
+        if blob.qpath_gitem is not None and blob.qpath_gitem.isVisible() != visibility:
+            self.setBlobVisible(blob, visibility)
+            if visibility:
+                blob.qpath_gitem.setOpacity(self.transparency_value)
+
+    def updateVisibility(self, changed_labels_only=False):
+        """
+        Show/hide the blobs according to the visibility of their class. If changed_labels_only is True only the blobs
+        of the classes whose visibility changed since the last update are checked.
+        """
 
+        # the visibility of each class is queried only once
+        previous_visibility = self.visibility_of_class
+        visibility_of_class = {}
         for blob in self.annotations.seg_blobs:
-            visibility = self.project.isLabelVisible(blob.class_name)
-            self.setBlobVisible(blob, visibility)
+            visibility = visibility_of_class.get(blob.class_name)
+            if visibility is None:
+                visibility = self.project.isLabelVisible(blob.class_name)
+                visibility_of_class[blob.class_name] = visibility
+
+            if changed_labels_only and previous_visibility.get(blob.class_name) == visibility:
+                continue
+
+            # only the blobs that change state are updated
+            if blob.qpath_gitem is not None and blob.qpath_gitem.isVisible() != visibility:
+                self.setBlobVisible(blob, visibility)
+                if visibility:
+                    blob.qpath_gitem.setOpacity(self.transparency_value)
+
+        self.visibility_of_class = visibility_of_class
+
+    @pyqtSlot()
+    def updateLabelsVisibility(self):
+        self.updateVisibility(changed_labels_only=True)
 
 
 
 #SELECTED BLOBS MANAGEMENT
 
+    def isSelected(self, blob):
+        return blob in self.selected_set
+
     def addToSelectedList(self, blob):
         """
         Add the given blob to the list of selected blob.
         """
 
-        if blob in self.selected_blobs:
+        if blob in self.selected_set:
             self.logfile.info("[SELECTION] An already selected blob has been added to the current selection.")
         else:
             self.selected_blobs.append(blob)
-            str = "[SELECTION] A new blob (" + blob.blob_name + ";" + blob.class_name + ") has been selected."
-            self.logfile.info(str)
+            self.selected_set.add(blob)
+            self.logfile.info("[SELECTION] A new blob (%s;%s) has been selected.", blob.blob_name, blob.class_name)
 
         if not blob.qpath_gitem is None:
             blob.qpath_gitem.setPen(self.border_selected_pen)
@@ -562,24 +691,26 @@ class QtImageViewerPlus(QtImageViewer):
             blob.id_item.setZValue(4)
         else:
             print("blob qpath_qitem is None!")
-        self.scene.invalidate()
-        self.selectionChanged.emit()
+        self.invalidateBlobs()
+        self.notifySelectionChanged()
 
 
     def removeFromSelectedList(self, blob):
-        try:
-            # safer if iterating over selected_blobs and calling this function.
-            self.selected_blobs = [x for x in self.selected_blobs if not x == blob]
-            if not blob.qpath_gitem is None:
-                blob.qpath_gitem.setPen(self.border_pen)
-                blob.qpath_gitem.setZValue(1)
-                blob.id_item.setZValue(2)
 
-            self.scene.invalidate()
-        except Exception as e:
-            print("Exception: e", e)
-            pass
-        self.selectionChanged.emit()
+        # nothing to do for a blob which is not selected (e.g. when removed or undone)
+        if blob not in self.selected_set:
+            return
+
+        # the list is modified in place: the callers removing blobs iterate over a copy of selected_blobs
+        self.selected_blobs.remove(blob)
+        self.selected_set.discard(blob)
+        if not blob.qpath_gitem is None:
+            blob.qpath_gitem.setPen(self.border_pen)
+            blob.qpath_gitem.setZValue(1)
+            blob.id_item.setZValue(2)
+
+        self.invalidateBlobs()
+        self.notifySelectionChanged()
 
     def resetSelection(self):
         for blob in self.selected_blobs:
@@ -591,8 +722,9 @@ class QtImageViewerPlus(QtImageViewer):
                 blob.id_item.setZValue(2)
 
         self.selected_blobs.clear()
-        self.scene.invalidate(self.scene.sceneRect())
-        self.selectionChanged.emit()
+        self.selected_set.clear()
+        self.invalidateBlobs()
+        self.notifySelectionChanged()
         self.selectionReset.emit()
 
 
@@ -610,6 +742,23 @@ class QtImageViewerPlus(QtImageViewer):
 
         self.annotationsChanged.emit()
 
+    def addBlobs(self, blobs, selected = False):
+        """
+        Same as addBlob for many blobs (e.g. an imported label map): the annotations are updated
+        in a single pass and the scene is invalidated once.
+        """
+        with self.batchUpdates():
+            for blob in blobs:
+                self.undo_data.addBlob(blob)
+            self.project.addBlobs(self.image, blobs)
+            for blob in blobs:
+                self.drawBlob(blob)
+                if selected:
+                    self.addToSelectedList(blob)
+            self.updatePixmapCacheLimit()
+
+        self.annotationsChanged.emit()
+
     def removeBlob(self, blob):
         """
         The only function to remove annotations.
@@ -641,21 +790,26 @@ class QtImageViewerPlus(QtImageViewer):
 
     def deleteSelectedBlobs(self):
 
-        for blob in self.selected_blobs:
-            self.removeBlob(blob)
+        with self.batchUpdates():
+            for blob in list(self.selected_blobs):
+                self.removeBlob(blob)
         self.saveUndo()
 
     def assignClass(self, class_name):
         """
         Assign the given class to the selected blobs.
         """
+        # all the blobs get the same class, hence the same brush
+        brush = None
         for blob in self.selected_blobs:
             self.project.setBlobClass(self.image, blob, class_name)
             self.undo_data.setBlobClass(blob, class_name)
-            brush = self.project.classBrushFromName(blob)
+            if brush is None:
+                brush = self.project.classBrushFromName(blob)
             blob.qpath_gitem.setBrush(brush)
+            self.applyClassVisibility(blob)
 
-        self.scene.invalidate()
+        self.invalidateBlobs()
         self.annotationsChanged.emit()
 
     def setBlobClass(self, blob, class_name):
@@ -668,8 +822,9 @@ class QtImageViewerPlus(QtImageViewer):
 
         brush = self.project.classBrushFromName(blob)
         blob.qpath_gitem.setBrush(brush)
+        self.applyClassVisibility(blob)
 
-        self.scene.invalidate()
+        self.invalidateBlobs()
         self.annotationsChanged.emit()
 
 #UNDO STUFF
@@ -683,25 +838,25 @@ class QtImageViewerPlus(QtImageViewer):
         if operation is None:
             return
 
-        for blob in operation['remove']:
-            message = "[UNDO][REMOVE] BLOBID={:d} VERSION={:d}".format(blob.id, blob.version)
-            self.logfile.info(message)
-            self.removeFromSelectedList(blob)
-            self.undrawBlob(blob)
-            self.annotations.removeBlob(blob)
-
-        for blob in operation['add']:
-            message = "[UNDO][ADD] BLOBID={:d} VERSION={:d}".format(blob.id, blob.version)
-            self.logfile.info(message)
-            self.annotations.addBlob(blob)
-            self.selected_blobs.append(blob)
-            self.selectionChanged.emit()
-            self.drawBlob(blob)
-
-        for (blob, class_name) in operation['class']:
-            blob.class_name = class_name
-            brush = self.project.classBrushFromName(blob)
-            blob.qpath_gitem.setBrush(brush)
+        with self.batchUpdates():
+            for blob in operation['remove']:
+                self.logfile.info("[UNDO][REMOVE] BLOBID=%d VERSION=%d", blob.id, blob.version)
+                self.removeFromSelectedList(blob)
+                self.undrawBlob(blob)
+                self.annotations.removeBlob(blob)
+
+            for blob in operation['add']:
+                self.logfile.info("[UNDO][ADD] BLOBID=%d VERSION=%d", blob.id, blob.version)
+                self.annotations.addBlob(blob)
+                self.selected_blobs.append(blob)
+                self.selected_set.add(blob)
+                self.notifySelectionChanged()
+                self.drawBlob(blob)
+
+            for (blob, class_name) in operation['class']:
+                blob.class_name = class_name
+                brush = self.project.classBrushFromName(blob)
+                blob.qpath_gitem.setBrush(brush)
 
         self.updateVisibility()
 
@@ -710,25 +865,25 @@ class QtImageViewerPlus(QtImageViewer):
         if operation is None:
             return
 
-        for blob in operation['add']:
-            message = "[REDO][ADD] BLOBID={:d} VERSION={:d}".format(blob.id, blob.version)
-            self.logfile.info(message)
-            self.removeFromSelectedList(blob)
-            self.undrawBlob(blob)
-            self.annotations.removeBlob(blob)
-
-        for blob in operation['remove']:
-            message = "[REDO][REMOVE] BLOBID={:d} VERSION={:d}".format(blob.id, blob.version)
-            self.logfile.info(message)
-            self.annotations.addBlob(blob)
-            self.selected_blobs.append(blob)
-            self.selectionChanged.emit()
-            self.drawBlob(blob)
-
-        for (blob, class_name) in operation['newclass']:
-            blob.class_name = class_name
-            brush = self.project.classBrushFromName(blob)
-            blob.qpath_gitem.setBrush(brush)
+        with self.batchUpdates():
+            for blob in operation['add']:
+                self.logfile.info("[REDO][ADD] BLOBID=%d VERSION=%d", blob.id, blob.version)
+                self.removeFromSelectedList(blob)
+                self.undrawBlob(blob)
+                self.annotations.removeBlob(blob)
+
+            for blob in operation['remove']:
+                self.logfile.info("[REDO][REMOVE] BLOBID=%d VERSION=%d", blob.id, blob.version)
+                self.annotations.addBlob(blob)
+                self.selected_blobs.append(blob)
+                self.selected_set.add(blob)
+                self.notifySelectionChanged()
+                self.drawBlob(blob)
+
+            for (blob, class_name) in operation['newclass']:
+                blob.class_name = class_name
+                brush = self.project.classBrushFromName(blob)
+                blob.qpath_gitem.setBrush(brush)
 
         self.updateVisibility()
 
@@ -71,6 +71,9 @@ class QtMapViewer(QGraphicsView):
 
         self.pixmapitem = None
 
+        # last highlighted rectangle (in pixmap pixels), used to skip redundant redraws
+        self.overlay_label = None
+
         self.setFixedWidth(preferred_size)
         self.setFixedHeight(preferred_size)
 
@@ -84,6 +87,8 @@ class QtMapViewer(QGraphicsView):
             self.scene.removeItem(self.pixmapitem)
             self.pixmapitem = None
 
+        self.overlay_label = None
+
     def setNewWidth(self, width):
 
         self.setFixedWidth(width)
@@ -93,6 +98,7 @@ class QtMapViewer(QGraphicsView):
         self.pixmap = pixmap
         self.imgwidth = self.pixmap.width()
         self.imgheight = self.pixmap.height()
+        self.overlay_label = None
 
         if self.pixmapitem is None:
             self.pixmapitem = self.scene.addPixmap(self.pixmap)
@@ -132,6 +138,12 @@ class QtMapViewer(QGraphicsView):
             W = self.pixmap.width()
             H = self.pixmap.height()
 
+            # the highlighted area is drawn in pixmap pixels, skip the update if it does not change
+            label = (int(rect.left() * W), int(rect.top() * H), int(rect.width() * W), int(rect.height() * H), self.opacity)
+            if label == self.overlay_label:
+                return
+            self.overlay_label = label
+
             self.HIGHLIGHT_RECT_WIDTH = rect.width() * W
             self.HIGHLIGHT_RECT_HEIGHT = rect.height() * H
             self.HIGHLIGHT_RECT_POSX = rect.left() * W
@@ -159,16 +171,8 @@ class QtMapViewer(QGraphicsView):
         #self.fitInView(self.sceneRect(), self.aspectRatioMode)
 
     def clipScenePos(self, scenePosition):
-        posx = scenePosition.x()
-        posy = scenePosition.y()
-        if posx < 0:
-            posx = 0
-        if posy < 0:
-            posy = 0
-        if posx > self.imgwidth:
-            posx = self.imgwidth
-        if posy > self.imgheight:
-            posy = self.imgheight
+        posx = max(0, min(scenePosition.x(), self.imgwidth))
+        posy = max(0, min(scenePosition.y(), self.imgheight))
 
         return [posx, posy]
 
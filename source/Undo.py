@@ -3,11 +3,14 @@
 # BUT if you want to modify  blob make a copy, remove the original modify the copy and add the copy.
 # similar approach when splitting or joining blobs.
 
+from collections import deque
+
 class Undo(object):
     def __init__(self):
         self.position = -1
         self.max_undo = 200
-        self.operations = []
+        # bounded buffer, the oldest operation is dropped automatically when max_undo is reached
+        self.operations = deque(maxlen=self.max_undo)
         self.operation = { 'remove':[], 'add':[], 'class':[], 'newclass':[] }   #current operation
 
     def addBlob(self, blob):
@@ -22,7 +25,8 @@ class Undo(object):
 
     def saveUndo(self):
         #clip future redo, invalidated by a new change
-        self.operations = self.operations[:self.position+1]
+        while len(self.operations) > self.position + 1:
+            self.operations.pop()
         """
         Will mark an undo step using the previously added and removed blobs.
         """
@@ -31,8 +35,6 @@ class Undo(object):
 
         self.operations.append(self.operation)
         self.operation = { 'remove':[], 'add':[], 'class':[], 'newclass':[] }
-        if len(self.operations) > self.max_undo:
-            self.operations.pop(0)
         self.position = len(self.operations) -1;
 
     def undo(self):
@@ -0,0 +1,32 @@
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+class WorkerSignals(QObject):
+
+    # emits the value returned by the function and the error message (empty if the function succeeded)
+    finished = pyqtSignal(object, str)
+
+class Worker(QRunnable):
+    """
+    Run a function outside the GUI thread: QThreadPool.globalInstance().start(worker).
+    The function must not access the widgets or the QImages shown by the GUI.
+    """
+
+    def __init__(self, function, *args):
+        super(Worker, self).__init__()
+
+        self.function = function
+        self.args = args
+        self.signals = WorkerSignals()
+
+        # the worker is owned (and released) by the caller
+        self.setAutoDelete(False)
+
+    def run(self):
+        result = None
+        error = ""
+        try:
+            result = self.function(*self.args)
+        except Exception as e:
+            error = str(e)
+
+        self.signals.finished.emit(result, error)
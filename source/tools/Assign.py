@@ -23,8 +23,7 @@ class Assign(Tool):
             for blob in self.viewerplus.selected_blobs:
                 self.viewerplus.setBlobClass(blob, self.active_label)
 
-            message ="[TOOL][ASSIGN] Blob(s) assigned ({:d}) (CLASS={:s}).".format(len(self.viewerplus.selected_blobs), self.active_label)
-            self.viewerplus.logfile.info(message)
+            self.viewerplus.logfile.info("[TOOL][ASSIGN] Blob(s) assigned (%d) (CLASS=%s).", len(self.viewerplus.selected_blobs), self.active_label)
 
             self.viewerplus.saveUndo()
             self.viewerplus.resetSelection()
\ No newline at end of file
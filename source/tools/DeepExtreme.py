@@ -7,16 +7,34 @@ from source import utils
 import os
 import numpy as np
 
-try:
-    import torch
-    from torch.nn.functional import upsample
-except Exception as e:
-    print("Incompatible version between pytorch, cuda and python.\n" +
-          "Knowing working version combinations are\n: Cuda 10.0, pytorch 1.0.0, python 3.6.8" + str(e))
+# pytorch and the network modules take seconds to import, they are imported the first time the tool is used
+torch = None
+interpolate = None
+resnet = None
+helpers = None
+
+def importPytorch():
+    global torch, interpolate, resnet, helpers
+
+    if torch is not None:
+        return
+
+    try:
+        import torch
+        from torch.nn.functional import interpolate
+        # the DEXTR input has always the same size (512 x 512), let cuDNN pick the fastest kernels
+        torch.backends.cudnn.benchmark = True
+        # TF32 math on Ampere GPUs (pytorch 1.7+)
+        if hasattr(torch.backends.cudnn, "allow_tf32"):
+            torch.backends.cudnn.allow_tf32 = True
+            torch.backends.cuda.matmul.allow_tf32 = True
+    except Exception as e:
+        print("Incompatible version between pytorch, cuda and python.\n" +
+              "Knowing working version combinations are\n: Cuda 10.0, pytorch 1.0.0, python 3.6.8" + str(e))
+
+    import models.deeplab_resnet as resnet
+    from models.dataloaders import helpers as helpers
 
-import models.deeplab_resnet as resnet
-from models.dataloaders import helpers as helpers
-from collections import OrderedDict
 
 
 class DeepExtreme(Tool):
@@ -27,6 +45,8 @@ class DeepExtreme(Tool):
         self.CROSS_LINE_WIDTH = 2
         self.pick_style = {'width': self.CROSS_LINE_WIDTH, 'color': Qt.red,  'size': 6}
         self.deepextreme_net = None
+        self.device = None
+        self.input_buffer = None
 
     def leftPressed(self, x, y, mods):
         points = self.pick_points.points
@@ -49,13 +69,15 @@ class DeepExtreme(Tool):
         self.infoMessage.emit("Segmentation is ongoing..")
         self.log.emit("[TOOL][DEEPEXTREME] Segmentation begins..")
 
-        self.loadNetwork()
+        importPytorch()
+
+        # the network is loaded (and moved to the device) only the first time
+        if self.deepextreme_net is None:
+            self.loadNetwork()
 
         pad = 50
         thres = 0.8
-        gpu_id = 0
-        device = torch.device("cuda:" + str(gpu_id) if torch.cuda.is_available() else "cpu")
-        self.deepextreme_net.to(device)
+        device = self.device
 
         extreme_points_to_use = np.asarray(self.pick_points.points).astype(int)
         pad_extreme = 100
@@ -93,21 +115,25 @@ class DeepExtreme(Tool):
             input_dextr = np.concatenate((resize_image, extreme_heatmap[:, :, np.newaxis]), axis=2)
             inputs = torch.from_numpy(input_dextr.transpose((2, 0, 1))[np.newaxis, ...])
 
-            # Run a forward pass
-            inputs = inputs.to(device)
-            outputs = self.deepextreme_net.forward(inputs)
-            outputs = upsample(outputs, size=(512, 512), mode='bilinear', align_corners=True)
-            outputs = outputs.to(torch.device('cpu'))
-
-            pred = np.transpose(outputs.data.numpy()[0, ...], (1, 2, 0))
-            pred = 1 / (1 + np.exp(-pred))
-            pred = np.squeeze(pred)
-            img_test = utils.floatmapToQImage(pred*255.0)
-            img_test.save("prediction.png")
+            # the input tensor is allocated once on the device and re-filled at each segmentation
+            if self.input_buffer is None or self.input_buffer.device != device:
+                if device.type == "cuda":
+                    self.input_buffer = torch.empty(inputs.shape, dtype=torch.float16, device=device)
+                    self.input_buffer = self.input_buffer.contiguous(memory_format=torch.channels_last)
+                else:
+                    self.input_buffer = torch.empty(inputs.shape, dtype=torch.float32, device=device)
+
+            # Run a forward pass (half precision on the GPU)
+            self.input_buffer.copy_(inputs)
+            outputs = self.deepextreme_net.forward(self.input_buffer)
+            outputs = interpolate(outputs, size=(512, 512), mode='bilinear', align_corners=True)
+
+            # the sigmoid is computed on the device, only the final (512 x 512) map is copied back
+            pred = torch.sigmoid(outputs.float())[0, 0].to(torch.device('cpu')).numpy()
             result = helpers.crop2fullmask(pred, bbox, im_size=img.shape[:2], zero_pad=True, relax=pad) > thres
 
-
-            segm_mask = result.astype(int)
+            # zero-copy reinterpretation of the boolean mask
+            segm_mask = result.view(np.uint8)
 
             #TODO: move this function to blob!!!
             blobs = self.viewerplus.annotations.blobsFromMask(segm_mask, left_map_pos, top_map_pos, area_extreme_points)
@@ -140,26 +166,31 @@ class DeepExtreme(Tool):
         models_dir = "models/"
 
         # dictionary layers' names - weights
-        state_dict_checkpoint = torch.load(os.path.join(models_dir, modelName + '.pth'),
-                                           map_location=lambda storage, loc: storage)
+        state_dict_checkpoint = torch.load(os.path.join(models_dir, modelName + '.pth'), map_location='cpu')
 
         # Remove the prefix .module from the model when it is trained using DataParallel
-        if 'module.' in list(state_dict_checkpoint.keys())[0]:
-            new_state_dict = OrderedDict()
-            for k, v in state_dict_checkpoint.items():
-                name = k[7:]  # remove `module.` from multi-gpu training
-                new_state_dict[name] = v
-        else:
-            new_state_dict = state_dict_checkpoint
+        if next(iter(state_dict_checkpoint)).startswith('module.'):
+            state_dict_checkpoint = {k[7:]: v for k, v in state_dict_checkpoint.items()}
 
-        self.deepextreme_net.load_state_dict(new_state_dict)
+        self.deepextreme_net.load_state_dict(state_dict_checkpoint)
         self.deepextreme_net.eval()
-        if not torch.cuda.is_available():
+        gpu_id = 0
+        self.device = torch.device("cuda:" + str(gpu_id) if torch.cuda.is_available() else "cpu")
+        self.deepextreme_net.to(self.device)
+        if torch.cuda.is_available():
+            # FP16 weights and NHWC layout use the tensor cores and halve the memory traffic of the convolutions
+            self.deepextreme_net.to(memory_format=torch.channels_last).half()
+        else:
             print("CUDA NOT AVAILABLE!")
 
     def resetNetwork(self):
-        torch.cuda.empty_cache()
+        """
+        Release the network (and its buffers), e.g. to free the GPU memory for other networks.
+        """
+        if self.deepextreme_net is None:
+            return
 
-        if self.deepextreme_net is not None:
-            del self.deepextreme_net
-            self.deepextreme_net = None
\ No newline at end of file
+        del self.deepextreme_net
+        self.deepextreme_net = None
+        self.input_buffer = None
+        torch.cuda.empty_cache()
\ No newline at end of file
@@ -1,6 +1,6 @@
 import numpy as np
 
-from PyQt5.QtCore import Qt, QObject, QPointF, QRectF, QFileInfo, QDir, pyqtSlot, pyqtSignal, QT_VERSION_STR
+from PyQt5.QtCore import Qt, QObject, QTimer, QPointF, QRectF, QFileInfo, QDir, pyqtSlot, pyqtSignal, QT_VERSION_STR
 from PyQt5.QtGui import QImage, QPixmap, QPainter, QPainterPath, QPen, QImageReader, QFont
 from PyQt5.QtWidgets import QApplication, QGraphicsView, QGraphicsItem, QGraphicsScene, QFileDialog, QGraphicsPixmapItem
 
@@ -14,38 +14,56 @@ class EditPoints(QObject):
         self.scene = scene
         self.points = []
 
+        # the points of the current stroke are stored in a preallocated buffer, grown by doubling
+        self.STROKE_BUFFER_SIZE = 1024
+        self.stroke = None
+        self.stroke_length = 0
+
         self.border_pen = QPen(Qt.black, 3)
         #        pen.setJoinStyle(Qt.MiterJoin)
         #        pen.setCapStyle(Qt.RoundCap)
         self.border_pen.setCosmetic(True)
 
+        # the path is grown in place and handed to the item at most once per frame
+        self.edit_path = QPainterPath()
         self.qpath_gitem = self.scene.addPath(QPainterPath(), self.border_pen)
         self.qpath_gitem.setZValue(5)
+        self.path_timer = QTimer(self)
+        self.path_timer.setSingleShot(True)
+        self.path_timer.setInterval(16)
+        self.path_timer.timeout.connect(self.updatePath)
         self.last_editborder_points = []
         self.last_blob = None
 
     def reset(self):
-        self.qpath_gitem.setPath(QPainterPath())
+        self.path_timer.stop()
+        self.edit_path = QPainterPath()
+        self.qpath_gitem.setPath(self.edit_path)
         self.points = []
 
+    @pyqtSlot()
+    def updatePath(self):
+        self.qpath_gitem.setPath(self.edit_path)
+
 
     #return true if the first points for a tool
     def startDrawing(self, x, y):
 
         first_start = False
         if len(self.points) == 0:  # first point, initialize
-            self.qpath_gitem.setPath(QPainterPath())
+            self.edit_path = QPainterPath()
             first_start = True
 
             message = "[TOOL] DRAWING starts.."
             self.log.emit(message)
 
-        self.points.append(np.array([[x, y]]))
+        self.stroke = np.empty((self.STROKE_BUFFER_SIZE, 2), dtype=int)
+        self.stroke[0] = [x, y]
+        self.stroke_length = 1
+        self.points.append(self.stroke[:1])
 
-        path = self.qpath_gitem.path()
-        path.moveTo(QPointF(x, y))
-        self.qpath_gitem.setPath(path)
-        self.scene.invalidate()
+        self.edit_path.moveTo(QPointF(x, y))
+        self.updatePath()
 
         return first_start
 
@@ -55,12 +73,13 @@ class EditPoints(QObject):
             return
 
         # check that a move didn't happen before a press
-        last_line = self.points[-1]
-
         last_point = self.points[-1][-1]
         if x != last_point[0] or y != last_point[1]:
-            self.points[-1] = np.append(last_line, [[x, y]], axis=0)
-            path = self.qpath_gitem.path()
-            path.lineTo(QPointF(x, y))
-            self.qpath_gitem.setPath(path)
-            self.scene.invalidate()
\ No newline at end of file
+            if self.stroke_length == self.stroke.shape[0]:
+                self.stroke = np.concatenate((self.stroke, np.empty_like(self.stroke)))
+            self.stroke[self.stroke_length] = [x, y]
+            self.stroke_length += 1
+            self.points[-1] = self.stroke[:self.stroke_length]
+            self.edit_path.lineTo(QPointF(x, y))
+            if not self.path_timer.isActive():
+                self.path_timer.start()
\ No newline at end of file
@@ -13,7 +13,7 @@ class  Match(Tool):
         if selected_blob is None:
             return
         if mods & Qt.ShiftModifier:
-            if selected_blob in self.viewerplus.selected_blobs:
+            if self.viewerplus.isSelected(selected_blob):
                 self.viewerplus.removeFromSelectedList(selected_blob)
             else:
                 self.viewerplus.addToSelectedList(selected_blob)
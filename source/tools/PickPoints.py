@@ -19,26 +19,22 @@ class PickPoints(object):
         self.markers.clear()
 
     def addPoint(self, x, y, style):
-        self.points.append(np.array([x, y]))
+        self.points.append(np.array([x, y], dtype=np.float32))
 
         pen = QPen(style['color'])
         pen.setWidth(style['width'])
         pen.setCosmetic(True)
 
         size = style['size']
-        point = self.scene.addEllipse(x, y, 0, 0, pen)
-        point.setZValue(5)
-        # line1 = self.viewerplus.scene.addLine(x - size, y - size, x + size, y + size, pen)
-        line1 = self.scene.addLine(- size, -size, +size, +size, pen)
-        line1.setPos(QPointF(x, y))
-        line1.setParentItem(point)  # self.viewerplus._pxmapitem)
-        line1.setFlag(QGraphicsItem.ItemIgnoresTransformations)
-        line1.setZValue(5)
+        cross = QPainterPath()
+        cross.moveTo(-size, -size)
+        cross.lineTo(size, size)
+        cross.moveTo(-size, size)
+        cross.lineTo(size, -size)
 
-        line2 = self.scene.addLine(- size, + size, + size, - size, pen)
-        line2.setPos(QPointF(x, y))
-        line2.setParentItem(point)  # self.viewerplus._pxmapitem)
-        line2.setFlag(QGraphicsItem.ItemIgnoresTransformations)
-        line2.setZValue(5)
-        # no need to add the lines to the markers, the parent will take care of them
-        self.markers.append(point)
\ No newline at end of file
+        # a single item draws the cross, its size does not depend on the zoom
+        marker = self.scene.addPath(cross, pen)
+        marker.setPos(QPointF(x, y))
+        marker.setFlag(QGraphicsItem.ItemIgnoresTransformations)
+        marker.setZValue(5)
+        self.markers.append(marker)
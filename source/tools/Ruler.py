@@ -1,5 +1,6 @@
+import math
 import numpy as np
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QPointF
 from PyQt5.QtGui import QPen, QFont
 from PyQt5.QtWidgets import QGraphicsItem
 from source.tools.Tool import Tool
@@ -13,6 +14,7 @@ class Ruler(Tool):
         self.CROSS_LINE_WIDTH = 2
         self.pick_style = {'width': self.CROSS_LINE_WIDTH, 'color': Qt.cyan, 'size': 6}
         self.px_to_mm_factor = None
+        self.ruler_font = QFont("Calibri", 12, QFont.Bold)
 
     def setPxToMM(self, factor):
         self.px_to_mm_factor = factor
@@ -35,10 +37,9 @@ class Ruler(Tool):
     def drawRuler(self, annotations):
         # warging! this might move the pick points to the centroids of the blobs, redraw!
         measure = self.computeMeasure(annotations)
-        tmp = self.pick_points.points.copy()
-        self.pick_points.reset()
-        self.pick_points.addPoint(tmp[0][0], tmp[0][1], self.pick_style)
-        self.pick_points.addPoint(tmp[1][0], tmp[1][1], self.pick_style)
+        # the two markers are just moved, no need to remove and re-create them
+        for marker, point in zip(self.pick_points.markers, self.pick_points.points):
+            marker.setPos(QPointF(point[0], point[1]))
 
         # pick points number is now 2
         pen = QPen(Qt.blue)
@@ -53,18 +54,13 @@ class Ruler(Tool):
         middle_x = (start[0] + end[0]) / 2.0
         middle_y = (start[1] + end[1]) / 2.0
 
-        middle = self.scene.addEllipse(middle_x, middle_y, 0, 0)
-        middle.setZValue(5)
-
-        ruler_text = self.scene.addText('%.1f cm' % measure)
-        ruler_text.setFont(QFont("Calibri", 12, QFont.Bold))
-        ruler_text.setDefaultTextColor(Qt.white)
+        # plain text item, no rich text document needed for the measure
+        ruler_text = self.scene.addSimpleText('%.1f cm' % measure, self.ruler_font)
+        ruler_text.setBrush(Qt.white)
         ruler_text.setPos(middle_x, middle_y)
-        ruler_text.setParentItem(middle)
         ruler_text.setFlag(QGraphicsItem.ItemIgnoresTransformations)
         ruler_text.setZValue(5)
-        self.pick_points.markers.append(ruler_text);
-        self.pick_points.markers.append(middle);
+        self.pick_points.markers.append(ruler_text)
 
 
         self.log.emit("[TOOL][RULER] Measure taken.")
@@ -75,28 +71,16 @@ class Ruler(Tool):
         It computes the measure between two points. If this point lies inside two blobs
         the distance between the centroids is computed.
         """
-        points = self.pick_points.points
-        x1 = points[0][0]
-        y1 = points[0][1]
-        x2 = points[1][0]
-        y2 = points[1][1]
+        p0, p1 = self.pick_points.points
 
-        blob1 = annotations.clickedBlob(x1, y1)
-        blob2 = annotations.clickedBlob(x2, y2)
+        # both points are tested with a single pass over the blobs
+        (blob1, blob2) = annotations.clickedBlobs(np.array([p0, p1]))
 
         if blob1 is not None and blob2 is not None and blob1 is not blob2:
+            p0[:] = blob1.centroid[:2]
+            p1[:] = blob2.centroid[:2]
 
-            x1 = blob1.centroid[0]
-            y1 = blob1.centroid[1]
-            x2 = blob2.centroid[0]
-            y2 = blob2.centroid[1]
-
-            points[0][0] = x1
-            points[0][1] = y1
-            points[1][0] = x2
-            points[1][1] = y2
-
-        measurepx = np.sqrt(((x2 - x1) ** 2) + ((y2 - y1) ** 2))
+        measurepx = math.hypot(p1[0] - p0[0], p1[1] - p0[1])
 
         if self.px_to_mm_factor is None:
             raise Exception("map_px to mm factor in ruler needs to be explicitly set")
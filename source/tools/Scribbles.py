@@ -1,6 +1,6 @@
 import numpy as np
 
-from PyQt5.QtCore import Qt, QObject, QPointF, QRectF, QFileInfo, QDir, pyqtSlot, pyqtSignal, QT_VERSION_STR
+from PyQt5.QtCore import Qt, QObject, QPointF, QRectF, QFileInfo, QDir, QTimer, pyqtSlot, pyqtSignal, QT_VERSION_STR
 from PyQt5.QtGui import QImage, QPixmap, QPainter, QPainterPath, QPen, QBrush, QCursor, QColor
 from PyQt5.QtWidgets import QApplication, QGraphicsView, QGraphicsItem, QGraphicsScene, QFileDialog, QGraphicsPixmapItem
 
@@ -14,6 +14,11 @@ class Scribbles(QObject):
 
         self.scene = scene
         self.points = []
+
+        # the points of the current stroke are stored in a preallocated buffer, grown by doubling
+        self.STROKE_BUFFER_SIZE = 1024
+        self.stroke = None
+        self.stroke_length = 0
         self.size = []
         self.current_size = 30
 
@@ -26,6 +31,13 @@ class Scribbles(QObject):
         self.qpath_gitem = None
         self.qpath_list = []
 
+        # the path of the current stroke is kept here and set on its item at most once per frame
+        self.stroke_path = QPainterPath()
+        self.path_timer = QTimer(self)
+        self.path_timer.setSingleShot(True)
+        self.path_timer.setInterval(16)
+        self.path_timer.timeout.connect(self.updatePath)
+
         # scale factor of the cursor
         self.scale_factor = 1.0
 
@@ -33,6 +45,9 @@ class Scribbles(QObject):
 
     def reset(self):
 
+        self.path_timer.stop()
+        self.stroke_path = QPainterPath()
+
         for qpath_gitem in self.qpath_list:
             qpath_gitem.setPath(QPainterPath())
 
@@ -40,6 +55,11 @@ class Scribbles(QObject):
         self.label = []
         self.size = []
 
+    @pyqtSlot()
+    def updatePath(self):
+        if self.qpath_gitem is not None:
+            self.qpath_gitem.setPath(self.stroke_path)
+
     def setCustomCursor(self):
 
         cursor_size = self.current_size * self.scale_factor
@@ -93,19 +113,24 @@ class Scribbles(QObject):
             message = "[TOOL] DRAWING starts.."
             self.log.emit(message)
 
-        self.points.append(np.array([[x, y]]))
+        self.stroke = np.empty((self.STROKE_BUFFER_SIZE, 2), dtype=int)
+        self.stroke[0] = [x, y]
+        self.stroke_length = 1
+        self.points.append(self.stroke[:1])
         self.label.append(self.current_label)
         self.size.append(self.current_size)
 
-        self.qpath_gitem = self.scene.addPath(QPainterPath(), self.border_pen)
-        self.qpath_gitem.setZValue(5)
+        # flush the previous stroke before switching item
+        if self.path_timer.isActive():
+            self.path_timer.stop()
+            self.updatePath()
 
-        path = self.qpath_gitem.path()
-        path.moveTo(QPointF(x, y))
-        self.qpath_list.append(self.qpath_gitem)
+        self.stroke_path = QPainterPath()
+        self.stroke_path.moveTo(QPointF(x, y))
 
-        self.qpath_gitem.setPath(path)
-        self.scene.invalidate()
+        self.qpath_gitem = self.scene.addPath(self.stroke_path, self.border_pen)
+        self.qpath_gitem.setZValue(5)
+        self.qpath_list.append(self.qpath_gitem)
 
         return first_start
 
@@ -115,13 +140,13 @@ class Scribbles(QObject):
             return
 
         # check that a move didn't happen before a press
-        last_line = self.points[-1]
-
         last_point = self.points[-1][-1]
         if x != last_point[0] or y != last_point[1]:
-            self.points[-1] = np.append(last_line, [[x, y]], axis=0)
-            path = self.qpath_list[-1].path()
-            path.lineTo(QPointF(x, y))
-            self.qpath_gitem.setPath(path)
-            self.qpath_gitem.setPen(self.border_pen)
-            self.scene.invalidate()
\ No newline at end of file
+            if self.stroke_length == self.stroke.shape[0]:
+                self.stroke = np.concatenate((self.stroke, np.empty_like(self.stroke)))
+            self.stroke[self.stroke_length] = [x, y]
+            self.stroke_length += 1
+            self.points[-1] = self.stroke[:self.stroke_length]
+            self.stroke_path.lineTo(QPointF(x, y))
+            if not self.path_timer.isActive():
+                self.path_timer.start()
\ No newline at end of file
@@ -43,7 +43,7 @@ class SplitBlob(Tool):
         points = self.pick_points.points
 
         self.viewerplus.removeBlob(selected_blob)
-        created_blobs = self.viewerplus.annotations.splitBlob(self.viewerplus.img_map, selected_blob, points)
+        created_blobs = self.viewerplus.annotations.splitBlob(self.viewerplus.imgMapArray(), selected_blob, points)
 
         self.blobInfo.emit(selected_blob, "[TOOL][SPLITBLOB][BLOB-SELECTED]")
 
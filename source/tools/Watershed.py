@@ -3,13 +3,15 @@ from source.Blob import Blob
 from source import Mask
 from source import utils
 import numpy as np
-from skimage import measure, filters
+from skimage import filters
 from skimage.morphology import disk
 from skimage.color import rgb2gray
 from skimage.filters import sobel
 import cv2
+from collections import namedtuple
 
-
+# the properties of a connected component used by the Blob constructor (as in skimage.measure.regionprops)
+Region = namedtuple('Region', ['centroid', 'bbox', 'image'])
 
 class Watershed(Tool):
     def __init__(self, viewerplus, scribbles):
@@ -57,11 +59,10 @@ class Watershed(Tool):
         if working_area[1] + working_area[2] > self.viewerplus.img_map.width() - 1:
             working_area[2] = self.viewerplus.img_map.width() - 1 - working_area[1]
 
-        crop_img = utils.cropQImage(self.viewerplus.img_map, working_area)
-        crop_imgnp = utils.qimageToNumpyArray(crop_img)
+        crop_imgnp = utils.cropImage(self.viewerplus.imgMapArray(), working_area)
 
-        # create markers
-        mask = np.zeros((working_area[3], working_area[2], 3), dtype=np.int32)
+        # create markers, the scribbles are drawn directly with their marker value
+        markers = np.zeros((working_area[3], working_area[2]), dtype=np.int32)
 
         color_codes = dict()
         counter = 1
@@ -71,7 +72,6 @@ class Watershed(Tool):
             b = col[2]
             g = col[1]
             r = col[0]
-            color = (b, g, r)
 
             color_code = b + 256 * g + 65536 * r
             color_key = str(color_code)
@@ -86,58 +86,39 @@ class Watershed(Tool):
             curve[:, 1] = curve[:, 1] - working_area[0]
 
             curve = curve.reshape((-1, 1, 2))
-            mask = cv2.polylines(mask, pts=[curve], isClosed=False, color=color,
-                                 thickness=self.scribbles.size[i], lineType=cv2.LINE_8)
-
-        mask = np.uint8(mask)
-
-        markers = np.zeros((working_area[3], working_area[2]), dtype='int32')
-        for label in self.scribbles.label:
-            col = label.fill
-            b = col[2]
-            g = col[1]
-            r = col[0]
-            color_code = b + 256 * g + 65536 * r
-            color_key = str(color_code)
-
-            idx = np.where((mask[:, :, 0] == b) & (mask[:, :, 1] == g) & (mask[:, :, 2] == r))
             (value, name) = color_codes[color_key]
-            markers[idx] = value
-
-        # markers = np.int32(255*rgb2gray(mask))
-        # markersprint = 255*rgb2gray(mask)
-        markersprint = markers
-        cv2.imwrite('mask.png', markersprint)
+            markers = cv2.polylines(markers, pts=[curve], isClosed=False, color=int(value),
+                                    thickness=self.scribbles.size[i], lineType=cv2.LINE_8)
 
         # watershed segmentation
         segmentation = cv2.watershed(crop_imgnp, markers)
         segmentation = filters.median(segmentation, disk(5), mode="mirror")
-        cv2.imwrite('segmentation.png', segmentation)
-
-        # the result of the segmentation must be converted into labels again
-        lbls = measure.label(segmentation)
 
+        # the result of the segmentation must be converted into labels again; the connected components are
+        # extracted (by OpenCV) class by class, the watershed boundaries (-1) and the unknown pixels (0) are skipped
         blobs = []
-        for region in measure.regionprops(lbls):
-            blob = Blob(region, working_area[1], working_area[0], self.viewerplus.annotations.getFreeId())
-            color_index = segmentation[region.coords[0][0], region.coords[0][1]]
-            data = list(color_codes.items())
-            index = 0
-            for i in range(len(data)):
-                (color_code, t) = data[i]
-                if t[0] == color_index:
-                    color_code = int(color_code)
-                    r = int(color_code / 65536)
-                    g = int(int(color_code - r * 65536) / 256)
-                    b = int(color_code - r * 65536 - g * 256)
-                    color = [r, g, b]
-                    name = t[1]
-                    break
-
-            blob.class_color = color
-            blob.class_name = name
-
-            blobs.append(blob)
+        for (color_key, (value, name)) in color_codes.items():
+            color_code = int(color_key)
+            r = int(color_code / 65536)
+            g = int(int(color_code - r * 65536) / 256)
+            b = int(color_code - r * 65536 - g * 256)
+
+            class_mask = (segmentation == value).astype(np.uint8)
+            (n, lbls, stats, centroids) = cv2.connectedComponentsWithStats(class_mask, connectivity=8)
+
+            for i in range(1, n):
+                top = stats[i, cv2.CC_STAT_TOP]
+                left = stats[i, cv2.CC_STAT_LEFT]
+                bottom = top + stats[i, cv2.CC_STAT_HEIGHT]
+                right = left + stats[i, cv2.CC_STAT_WIDTH]
+                region = Region(centroid=(centroids[i, 1], centroids[i, 0]), bbox=(top, left, bottom, right),
+                                image=lbls[top:bottom, left:right] == i)
+
+                blob = Blob(region, working_area[1], working_area[0], self.viewerplus.annotations.getFreeId())
+                blob.class_color = [r, g, b]
+                blob.class_name = name
+
+                blobs.append(blob)
 
         return blobs
 
@@ -160,7 +141,7 @@ class Watershed(Tool):
 
         blobs = self.segmentation()
 
-        for blob in blobs:
-            self.viewerplus.addBlob(blob)
-            
+        # all the regions are added at once (one viewport update, one annotationsChanged)
+        self.viewerplus.addBlobs(blobs)
+
         self.viewerplus.resetTools()
@@ -29,14 +29,8 @@ import datetime
 
 def clampCoords(x, y, W, H):
 
-    if x < 0:
-        x = 0
-    if y < 0:
-        y = 0
-    if x > W:
-        x = W
-    if y > H:
-        y = H
+    x = max(0, min(x, W))
+    y = max(0, min(y, H))
 
     return (x, y)
 
@@ -92,30 +86,25 @@ def maskToQImage(mask):
 
     h = mask.shape[0]
     w = mask.shape[1]
-    qimg = QImage(w, h, QImage.Format_RGB32)
-    qimg.fill(qRgb(0, 0, 0))
 
-    for y in range(h):
-        for x in range(w):
+    img = np.zeros((h, w, 3), dtype=np.uint8)
+    img[mask == 1] = 255
 
-            if mask[y, x] == 1:
-                qimg.setPixel(x, y, qRgb(255, 255, 255))
-
-    return qimg
+    return rgbToQImage(img)
 
 def labelsToQImage(mask):
 
     h = mask.shape[0]
     w = mask.shape[1]
-    qimg = QImage(w, h, QImage.Format_RGB32)
-    qimg.fill(qRgb(0, 0, 0))
 
-    for y in range(h):
-        for x in range(w):
-            c = mask[y, x]
-            qimg.setPixel(x, y, qRgb(c*17, c*163, c*211))
+    # same colors of qRgb(c*17, c*163, c*211), qRgb keeps only the lowest 8 bits of each component
+    labels = mask.astype(np.int64)
+    img = np.zeros((h, w, 3), dtype=np.uint8)
+    img[:, :, 0] = (labels * 17) & 0xff
+    img[:, :, 1] = (labels * 163) & 0xff
+    img[:, :, 2] = (labels * 211) & 0xff
 
-    return qimg
+    return rgbToQImage(img)
 
 def floatmapToQImage(floatmap, nodata = float('NaN')):
 
@@ -197,22 +186,8 @@ def prepareForDeepExtreme(qimage_map, four_points, pad_max):
     (xmin, ymin) = clampCoords(left, top, qimage_map.width(), qimage_map.height())
     (xmax, ymax) = clampCoords(right, bottom, qimage_map.width(), qimage_map.height())
 
-    w = xmax - xmin
-    h = ymax - ymin
-    qimage_cropped = qimage_map.copy(xmin, ymin, w, h)
-
-    fmt = qimage_cropped.format()
-    assert(fmt == QImage.Format_RGB32)
-
-    arr = np.zeros((h, w, 3), dtype=np.uint8)
-
-    bits = qimage_cropped.bits()
-    bits.setsize(int(h*w*4))
-    arrtemp = np.frombuffer(bits, np.uint8).copy()
-    arrtemp = np.reshape(arrtemp, [h, w, 4])
-    arr[:, :, 0] = arrtemp[:, :, 2]
-    arr[:, :, 1] = arrtemp[:, :, 1]
-    arr[:, :, 2] = arrtemp[:, :, 0]
+    # the (clamped) crop is sliced from a view of the map, only the crop is copied
+    arr = qimageToNumpyView(qimage_map)[ymin:ymax, xmin:xmax].copy()
 
     # update four point
     four_points_updated = np.zeros((4,2), dtype=np.int)
@@ -234,25 +209,49 @@ def cropQImage(qimage_map, bbox):
     return qimage_cropped
 
 
+def cropImage(img, bbox):
+    """
+    Crop a numpy image (H x W x C). As for QImage.copy, the pixels outside the image are set to zero.
+    """
+
+    top = bbox[0]
+    left = bbox[1]
+    h = bbox[3]
+    w = bbox[2]
+
+    if top >= 0 and left >= 0 and top + h <= img.shape[0] and left + w <= img.shape[1]:
+        return img[top:top+h, left:left+w].copy()
+
+    crop = np.zeros((h, w) + img.shape[2:], dtype=img.dtype)
+    y0 = max(top, 0)
+    x0 = max(left, 0)
+    y1 = min(top + h, img.shape[0])
+    x1 = min(left + w, img.shape[1])
+    if y1 > y0 and x1 > x0:
+        crop[y0-top:y1-top, x0-left:x1-left] = img[y0:y1, x0:x1]
+
+    return crop
+
 def qimageToNumpyArray(qimg):
 
-    w = qimg.width()
-    h = qimg.height()
+    # a single copy of the (RGB) view
+    return qimageToNumpyView(qimg).copy()
 
-    fmt = qimg.format()
-    assert (fmt == QImage.Format_RGB32)
+def qimageToNumpyView(qimg):
+    """
+    Return a read-only RGB (H x W x 3) numpy view of a RGB32 QImage, without copying the pixels.
+    The view is valid as long as the QImage is alive and not modified.
+    """
 
-    arr = np.zeros((h, w, 3), dtype=np.uint8)
+    assert (qimg.format() == QImage.Format_RGB32)
 
-    bits = qimg.bits()
-    bits.setsize(int(h * w * 4))
-    arrtemp = np.frombuffer(bits, np.uint8).copy()
-    arrtemp = np.reshape(arrtemp, [h, w, 4])
-    arr[:, :, 0] = arrtemp[:, :, 2]
-    arr[:, :, 1] = arrtemp[:, :, 1]
-    arr[:, :, 2] = arrtemp[:, :, 0]
+    h = qimg.height()
+    bits = qimg.constBits()
+    bits.setsize(int(h * qimg.bytesPerLine()))
+    arr = np.frombuffer(bits, np.uint8).reshape(h, qimg.bytesPerLine() // 4, 4)
 
-    return arr
+    # BGRA -> RGB (negative stride on the channels)
+    return arr[:, :qimg.width(), 2::-1]
 
 def prepareLabelForDeepExtreme(qimage_map, four_points, pad_max):
     """
@@ -279,13 +278,11 @@ def prepareLabelForDeepExtreme(qimage_map, four_points, pad_max):
 
     bits = qimage_cropped.bits()
     bits.setsize(int(h*w*4))
-    arrtemp = np.frombuffer(bits, np.uint8).copy()
+    arrtemp = np.frombuffer(bits, np.uint8)
     arrtemp = np.reshape(arrtemp, [h, w, 4])
 
-    for y in range(h):
-        for x in range(w):
-            if arrtemp[y, x, 2] != 0 or arrtemp[y, x, 1] != 0 or arrtemp[y, x, 0] != 0:
-                arr[y, x] = 1
+    # labeled pixels are the non-black ones
+    arr[:, :, 0] = np.any(arrtemp[:, :, :3] != 0, axis=2)
 
     # update four point
     four_points_updated = np.zeros((4,2), dtype=np.int)